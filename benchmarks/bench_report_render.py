@@ -0,0 +1,138 @@
+"""Замер сборки текста отчётов: прежние f-строки и += против ReportTemplate.
+
+Ни БД, ни Telegram не нужны - сравнивается только CPU-время рендера
+отчёта о закрытии смены и страницы статистики на сотни строк.
+
+    python -m benchmarks.bench_report_render --rows 300 --repeats 2000
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.handlers.admin_handler.statistics.stats_pages import STATS_TEXTS, STATS_TEMPLATES
+from src.handlers.user_handler.finish_shift import report as finish_shift_report
+from src.utils.templates import split_message
+
+
+def legacy_finish_shift_report(dictionary: Dict[str, Any], date: str, fullname: str) -> str:
+    # сборка, которая была в finish_shift.report до шаблонов (без экранирования)
+    return "📝Закрытие смены:\n\n"\
+           f"Дата: {date}\n" \
+           f"Точка: {dictionary['place']}\n" \
+           f"Имя: {fullname}\n\n" \
+           f"Льготники: <em>{dictionary['beneficiaries']}</em>\n" \
+           f"Общая выручка: <em>{dictionary['summary']}</em>\n" \
+           f"Наличные: <em>{dictionary['cash']}</em>\n" \
+           f"Безнал: <em>{dictionary['online_cash']}</em>\n" \
+           f"QR-код: <em>{dictionary['qr_code']}</em>\n" \
+           f"Расход: <em>{dictionary['expenditure']}</em>\n" \
+           f"Зарплата: <em>{dictionary['salary']}</em>\n" \
+           f"В конверт: <em>{dictionary['convert']}</em>\n\n" \
+           f"Общее количество прокатов на карусели: <em>{dictionary['count_rentals_carous']}</em>\n\n" \
+           f"Количество проката машинок 5 минут (7): <em>{dictionary['count_cars_5']}</em>\n" \
+           f"Количество проката машинок 10 минут (20): <em>{dictionary['count_cars_10']}</em>\n\n" \
+           f"Количество прокатов тележек: <em>{dictionary['count_rentals_cart']}</em>\n\n" \
+           f"Количество проданного доп.товара: <em>{dictionary['count_additional']}</em>\n"
+
+
+def legacy_stats_body(kind: str, rows: List[List[Any]]) -> str:
+    # тело страницы статистики, как его собирал render_stats_page через +=
+    _, group_line, item_line = STATS_TEXTS[kind]
+    item_line = item_line.replace("{value:raw}", "{value}")
+
+    report = ""
+    current_group = None
+    for group, label, value in rows:
+        if group != current_group:
+            if current_group is not None:
+                report += "\n"
+            report += group_line.format(group=group)
+            current_group = group
+
+        report += item_line.format(label=label, value=value)
+
+    return report
+
+
+def template_stats_body(kind: str, rows: List[List[Any]]) -> str:
+    _, group_line, item_line = STATS_TEMPLATES[kind]
+
+    chunks = []
+    current_group = None
+    for group, label, value in rows:
+        if group != current_group:
+            if current_group is not None:
+                chunks.append("\n")
+            chunks.append(group_line.render(group=group))
+            current_group = group
+
+        chunks.append(item_line.render(label=label, value=value))
+
+    return "".join(chunks)
+
+
+def make_shift_data() -> Dict[str, Any]:
+    data = {
+        field: str(i * 137)
+        for i, field in enumerate((
+            "beneficiaries", "summary", "cash", "online_cash", "qr_code", "expenditure", "salary", "convert",
+            "count_rentals_carous", "count_cars_5", "count_cars_10", "count_rentals_cart", "count_additional",
+        ))
+    }
+    data["place"] = "ТЦ Мега & Ко <север>"
+    return data
+
+
+def make_rows(count: int) -> List[List[Any]]:
+    # по 10 сотрудников на точку, как в выборке get_revenue_data_from_reports_by_date
+    return [[f"Точка {i // 10}", f"Сотрудник {i}", f"{i * 1234:,}".replace(",", " ")] for i in range(count)]
+
+
+def measure(func: Callable[[], Any], repeats: int) -> float:
+    func()  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started) / repeats * 1_000_000
+
+
+def cases(rows: int) -> List[Tuple[str, Callable[[], Any], Callable[[], Any]]]:
+    data = make_shift_data()
+    stats_rows = make_rows(rows)
+    long_text = template_stats_body("money", make_rows(rows * 5))
+
+    return [
+        (
+            "finish_shift report",
+            lambda: legacy_finish_shift_report(dictionary=data, date="01.06.2024", fullname="Иван <Иванов>"),
+            lambda: finish_shift_report(dictionary=data, date="01.06.2024", fullname="Иван <Иванов>"),
+        ),
+        (
+            f"money stats {rows} rows",
+            lambda: legacy_stats_body("money", stats_rows),
+            lambda: template_stats_body("money", stats_rows),
+        ),
+        (
+            # раньше длинный текст не резался вовсе, базовая линия - нарезка по 4096 без учёта тегов
+            f"split {len(long_text)} chars",
+            lambda: [long_text[i:i + 4096] for i in range(0, len(long_text), 4096)],
+            lambda: split_message(long_text),
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'случай':<28}{'было, мкс':>12}{'стало, мкс':>12}{'x':>8}")
+    for name, legacy, template in cases(rows=args.rows):
+        before = measure(legacy, repeats=args.repeats)
+        after = measure(template, repeats=args.repeats)
+        print(f"{name:<28}{before:>12.1f}{after:>12.1f}{before / after:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,112 @@
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone, timedelta, date
+from typing import List, Tuple
+from decimal import Decimal
+import asyncio
+import logging
+
 from aiogram import Bot
 
+from src.autoposting.outbox import outbox_wakeup, revenue_outbox_key
 from src.config import settings
+from src.database import unit_of_work
 from src.db.queries.dao.dao import AsyncOrm
-import asyncio
+from src.utils.formatting import format_money
+from src.utils.templates import ReportTemplate
+
+MSK = timezone(timedelta(hours=3.0))
+
+
+class RevenueReportScheduler:
+    # если в Finances нет ни одной точки, перепроверяем раз в сутки
+    IDLE_SLEEP_SECONDS = 24 * 60 * 60
+    # после ошибки не ждём до следующего срока, а пробуем снова через 5 минут
+    RETRY_SLEEP_SECONDS = 5 * 60
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.logger = logging.getLogger(__name__)
 
+    async def run(self) -> None:
+        while True:
+            try:
+                # дата последнего отчёта хранится в Finances.updated_at,
+                # поэтому расписание переживает перезапуск бота
+                finances = await AsyncOrm._check_data_from_finances()
 
-def creating_new_loop_for_checking_revenue(global_loop, bot: Bot):
-    asyncio.run_coroutine_threadsafe(send_revenue_report_by_N_days(bot), global_loop)
+                now = datetime.now(tz=MSK)
 
+                if any(self._due_at(updated_at) <= now for _, updated_at in finances):
+                    await self._send_reports(date_now=now.date())
+                    continue
 
-async def send_revenue_report_by_N_days(bot: Bot):
-    while True:
-        try:
-            date_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
-            how_many_days_ago_on_places = [
-                (place_id, (date_now - last_update_date).days) for place_id, last_update_date in await AsyncOrm._check_data_from_finances()
-            ]
+                await asyncio.sleep(self._seconds_until_next(finances=finances, now=now))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception("Ошибка при отправке отчёта по выручке")
+                await asyncio.sleep(self.RETRY_SLEEP_SECONDS)
 
-            for place_id, days_difference in how_many_days_ago_on_places:
-                if days_difference >= settings.DAYS_FOR_FINANCES_CHECK:
-                    await AsyncOrm.set_data_to_finances_by_place(place_id=place_id)
+    async def _send_reports(self, date_now: date) -> None:
+        # пересчёт Finances всех подошедших точек и очередь их отчётов - одна транзакция:
+        # точка перестаёт быть "подошедшей" только вместе с записью её отчёта в outbox,
+        # доставку с повторами делает OutboxWorker, упавшая отправка не теряет остальные точки
+        async with unit_of_work():
+            rows = await AsyncOrm.rollover_finances()
+            await AsyncOrm.add_outbox_deliveries([
+                {
+                    "report_id": revenue_outbox_key(place_id=place_id),
+                    "chat_id": settings.REVENUE_CHAT_ID,  # chat-id группы, куда бот будет присылать отчеты по выручке
+                    "method": "send_message",
+                    "payload": {
+                        "text": revenue_report(
+                            title=title,
+                            last_money=last_money,
+                            updated_money=updated_money,
+                            updated_at=updated_at,
+                            date_now=date_now,
+                        ),
+                    },
+                }
+                for place_id, title, last_money, updated_money, updated_at in rows
+            ])
 
-                    data = await AsyncOrm.get_data_from_finances_by_place(place_id=place_id)
+        outbox_wakeup.set()
 
-                    for title, _, last_money, updated_money, updated_at in data:
-                        chat_id = settings.REVENUE_CHAT_ID  # chat-id группы, куда бот будет присылать отчеты по выручке
-                        difference = updated_money - last_money
-                        last_money = f"{int(last_money):,}".replace(",", " ")
-                        updated_money = f"{int(updated_money):,}".replace(",", " ")
+    def _seconds_until_next(self, finances: List[Tuple[int, date]], now: datetime) -> float:
+        if not finances:
+            return self.IDLE_SLEEP_SECONDS
 
-                        report: str = "📊Статистика по росту выручки\n"
-                        report += f"<b>от</b> {updated_at.strftime('%d.%m.%y')} <b>до</b> {date_now.strftime('%d.%m.%y')}\n\n"
+        next_due = min(self._due_at(updated_at) for _, updated_at in finances)
+        return max((next_due - now).total_seconds(), 1.0)
 
-                        report += f"🏚Точка: <b>{title}</b>\n└"
-                        report += f"Выручка {updated_at.strftime('%d.%m.%y')}: <em><b>{last_money}₽</b></em>\n└"
-                        report += f"Выручка {date_now.strftime('%d.%m.%y')}: <em><b>{updated_money}₽</b></em>\n\n"
+    @staticmethod
+    def _due_at(updated_at: date) -> datetime:
+        # отчёт положен в полночь по МСК, когда с updated_at прошло DAYS_FOR_FINANCES_CHECK дней
+        due_date = updated_at + timedelta(days=settings.DAYS_FOR_FINANCES_CHECK)
+        return datetime(due_date.year, due_date.month, due_date.day, tzinfo=MSK)
 
-                        is_normal = True if difference > 0 else False
 
-                        difference = f"{int(difference):,}".replace(",", " ")
-                        report += f"Разница составила: <em><b>{difference}₽</b></em> "
+REVENUE_REPORT_TEMPLATE = ReportTemplate(
+    "📊Статистика по росту выручки\n"
+    "<b>от</b> {date_from} <b>до</b> {date_to}\n\n"
+    "🏚Точка: <b>{title}</b>\n└"
+    "Выручка {date_from}: <em><b>{last_money}₽</b></em>\n└"
+    "Выручка {date_to}: <em><b>{updated_money}₽</b></em>\n\n"
+    "Разница составила: <em><b>{difference}₽</b></em> {mark}\n\n"
+    "Результат: <em>{result}</em>"
+)
 
-                        report += f"{'🟢' if is_normal else '🔴'}\n\n"
-                        report += f"Результат: <em>{'все в норме✅' if is_normal else 'нужно смотреть камеры⚠️'}</em>"
 
-                        await bot.send_message(
-                            chat_id=chat_id,
-                            text=report,
-                            parse_mode="html",
-                        )
+def revenue_report(title: str, last_money: Decimal, updated_money: Decimal, updated_at: date, date_now: date) -> str:
+    is_normal = updated_money - last_money > 0
 
-            await asyncio.sleep(60 * 60)  # спим 1 час
-        except Exception:
-            await asyncio.sleep(60 * 60)  # спим 1 час
+    return REVENUE_REPORT_TEMPLATE.render(
+        date_from=updated_at.strftime('%d.%m.%y'),
+        date_to=date_now.strftime('%d.%m.%y'),
+        title=title,
+        last_money=format_money(last_money),
+        updated_money=format_money(updated_money),
+        difference=format_money(updated_money - last_money),
+        mark='🟢' if is_normal else '🔴',
+        result='все в норме✅' if is_normal else 'нужно смотреть камеры⚠️',
+    )
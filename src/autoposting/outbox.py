@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from itertools import groupby
+import asyncio
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from src.config import settings
+from src.db.queries.dao.dao import AsyncOrm
+from src.utils.report_delivery import ReportTrace, build_request
+
+# хендлеры будят воркер сразу после записи отчёта, не дожидаясь OUTBOX_POLL_SECONDS
+outbox_wakeup = asyncio.Event()
+
+
+def revenue_outbox_key(place_id: int) -> int:
+    # у отчётов по выручке нет строки в reports: в outbox они идут под отрицательным place_id.
+    # с reports.id не пересекается, а отчёты одной точки за разные периоды уходят по порядку
+    return -place_id
+
+
+class OutboxWorker:
+    # пока идёт отправка отчёта, другие процессы его не трогают
+    LEASE_SECONDS = 5 * 60
+    MAX_RETRY_DELAY_SECONDS = 60 * 60
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                deliveries = await AsyncOrm.claim_outbox_deliveries(
+                    batch_size=settings.OUTBOX_BATCH_SIZE,
+                    lease_seconds=self.LEASE_SECONDS,
+                )
+
+                if deliveries:
+                    # разные отчёты отправляем параллельно, лимиты Telegram соблюдает SendRateLimiterMiddleware
+                    await asyncio.gather(*(
+                        self._deliver_report(report_id=report_id, deliveries=list(report_deliveries))
+                        for report_id, report_deliveries in groupby(deliveries, key=lambda row: row.report_id)
+                    ))
+                    continue
+
+                outbox_wakeup.clear()
+                try:
+                    await asyncio.wait_for(outbox_wakeup.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception("Ошибка в воркере отправки отчётов")
+                await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
+
+    async def _deliver_report(self, report_id: int, deliveries: list) -> None:
+        # сообщения одного отчёта строго по порядку: текст, потом фото
+        trace = ReportTrace(kind="finish_shift_delivery" if report_id > 0 else "revenue_delivery")
+        # сколько отчёт пролежал в outbox с момента записи: вместе с отправкой это полная задержка
+        queued = datetime.now(tz=timezone.utc) - deliveries[0].created_at
+        trace.stages.append(("queued", round(queued.total_seconds() * 1000, 2)))
+        ok = False
+        try:
+            ok = await self._deliver_messages(report_id=report_id, deliveries=deliveries, trace=trace)
+        finally:
+            trace.finish(ok=ok)
+
+    async def _deliver_messages(self, report_id: int, deliveries: list, trace: ReportTrace) -> bool:
+        # True - все сообщения отчёта доставлены
+        delivered = True
+        for delivery in deliveries:
+            try:
+                await trace.measure(
+                    f"{delivery.id}:{delivery.method}",
+                    self.bot(build_request(chat_id=delivery.chat_id, method=delivery.method, payload=delivery.payload)),
+                )
+            except (TelegramBadRequest, TelegramForbiddenError) as e:
+                # повтор не поможет (бота выгнали из чата, протух file_id и т.п.)
+                await self._give_up(delivery=delivery, error=repr(e))
+                delivered = False
+                continue
+            except Exception as e:
+                attempts = delivery.attempts + 1
+                if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    await self._give_up(delivery=delivery, error=repr(e))
+                    delivered = False
+                    continue
+
+                delay = min(30 * 2 ** delivery.attempts, self.MAX_RETRY_DELAY_SECONDS)
+                self.logger.warning(f"Отчёт {report_id}: отправка не удалась ({e!r}), повтор через {delay} с")
+                await AsyncOrm.reschedule_outbox_deliveries(
+                    report_id=report_id,
+                    from_delivery_id=delivery.id,
+                    delay_seconds=delay,
+                    error=repr(e),
+                )
+                return False
+
+            await AsyncOrm.mark_outbox_delivery_sent(delivery_id=delivery.id)
+
+        return delivered
+
+    async def _give_up(self, delivery, error: str) -> None:
+        self.logger.error(f"Отчёт {delivery.report_id}: сообщение {delivery.id} не доставлено: {error}")
+        await AsyncOrm.mark_outbox_delivery_failed(delivery_id=delivery.id, error=error)
+
+        try:
+            await self.bot.send_message(
+                chat_id=settings.ADMIN_ID,
+                text=f"{'Finish shift' if delivery.report_id > 0 else 'Revenue'} report delivery error: {error}\n"
+                     f"Report_id: {delivery.report_id}",
+            )
+        except Exception:
+            self.logger.exception("Не удалось уведомить админа о недоставленном отчёте")
@@ -0,0 +1,6 @@
+from aiogram.filters.callback_data import CallbackData
+
+
+class StatsPageCallbackFactory(CallbackData, prefix="stats_page"):
+    kind: str
+    page: int
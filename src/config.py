@@ -1,3 +1,7 @@
+import logging
+from typing import Optional
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from aiogram.fsm.storage.redis import Redis
 
@@ -15,10 +19,76 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_NAME: str
 
+    # пул соединений. в худшем случае соединение нужно одновременно всем апдейтам
+    # (MAX_CONCURRENT_UPDATES), всем отчётам пачки outbox (OUTBOX_BATCH_SIZE) и прочим
+    # фоновым задачам (DB_BACKGROUND_CONNECTIONS: автоотчёт выручки, перезагрузка справочника, /health).
+    # DB_MAX_CONNECTIONS - бюджет соединений ОДНОГО процесса: max_connections Postgres (100 по умолчанию)
+    # минус запас для миграций и psql, делённые на число процессов бота.
+    # DB_MAX_OVERFLOW по умолчанию добирает пул до худшего случая, но не выше бюджета.
+    # пул меньше худшего случая - не ошибка: соединение отпускается перед каждым запросом
+    # к Telegram, и апдейт в пике просто ждёт его до DB_POOL_TIMEOUT секунд
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_MAX_CONNECTIONS: int = 20
+    DB_BACKGROUND_CONNECTIONS: int = 3
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
     REDIS_HOST: str
 
     DAYS_FOR_FINANCES_CHECK: int
 
+    DIRECTORY_RELOAD_SECONDS: int = 300
+
+    # сколько апдейтов из разных чатов обрабатывается одновременно
+    MAX_CONCURRENT_UPDATES: int = 50
+
+    # лимиты Telegram на исходящие сообщения
+    SEND_GLOBAL_PER_SECOND: float = 30
+    SEND_GROUP_PER_MINUTE: float = 20
+    SEND_PRIVATE_PER_SECOND: float = 1
+    SEND_MAX_RETRIES: int = 5
+
+    # доставка отчётов о закрытии смены из outbox
+    OUTBOX_POLL_SECONDS: int = 5
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_MAX_ATTEMPTS: int = 10
+
+    # если False, апдейты, пришедшие пока бот был выключен, будут обработаны
+    DROP_PENDING_UPDATES: bool = True
+
+    USE_WEBHOOK: bool = False
+    WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBAPP_HOST: str = "0.0.0.0"
+    WEBAPP_PORT: int = 8080
+
+    HEALTH_PATH: str = "/health"
+    # в режиме polling отдельный порт для проверки здоровья, 0 - не поднимать
+    HEALTH_PORT: int = 0
+
+    @property
+    def db_connections_required(self) -> int:
+        return self.MAX_CONCURRENT_UPDATES + self.OUTBOX_BATCH_SIZE + self.DB_BACKGROUND_CONNECTIONS
+
+    @model_validator(mode="after")
+    def check_db_pool(self) -> "Settings":
+        required = self.db_connections_required
+        if self.DB_MAX_OVERFLOW is None:
+            self.DB_MAX_OVERFLOW = max(min(required, self.DB_MAX_CONNECTIONS) - self.DB_POOL_SIZE, 0)
+
+        if self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW < required:
+            logging.getLogger(__name__).warning(
+                "Пул БД на %s соединений меньше худшего случая %s "
+                "(MAX_CONCURRENT_UPDATES + OUTBOX_BATCH_SIZE + DB_BACKGROUND_CONNECTIONS): "
+                "в пике апдейты будут ждать соединение до DB_POOL_TIMEOUT=%s с",
+                self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW, required, self.DB_POOL_TIMEOUT,
+            )
+        return self
+
     @property
     def get_url_asyncpg(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
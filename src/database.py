@@ -1,14 +1,108 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from src.config import settings
 
 async_engine = create_async_engine(
     settings.get_url_asyncpg,
     # echo=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # после перезапуска Postgres соединения в пуле мёртвые,
+    # pre-ping отбрасывает их до того, как на них уйдёт запрос
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        # кэш prepared statements самого asyncpg и его обёртки в SQLAlchemy,
+        # за pgbouncer в режиме transaction оба нужно выключать (0)
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
 )
 
 async_session = async_sessionmaker(bind=async_engine)
 
+# сессия текущей единицы работы (апдейта), если она открыта
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar("current_session", default=None)
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    # внутри уже открытой единицы работы отдаём её сессию: коммит в конце апдейта
+    # или раньше, перед первым запросом к Telegram (release_unit_of_work).
+    # иначе открываем свою транзакцию, она коммитится на выходе и откатывается при ошибке
+    session = _current_session.get()
+    if session is not None:
+        try:
+            yield session
+        except SQLAlchemyError:
+            # после ошибки БД Postgres всё равно не примет в этой транзакции ни одного запроса:
+            # откатываем её сразу, чтобы хендлер, поймавший исключение, мог продолжить работу с БД.
+            # прочие исключения транзакцию не ломают и её не трогают
+            await _rollback(session)
+            raise
+        return
+
+    async with async_session() as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+            await session.commit()
+        finally:
+            _current_session.reset(token)
+
+    await _run_after_commit(session)
+
+
+async def commit_unit_of_work(session: AsyncSession) -> None:
+    # коммит посреди апдейта: соединение возвращается в пул, сессией можно пользоваться дальше
+    try:
+        await session.commit()
+    except SQLAlchemyError:
+        await _rollback(session)
+        raise
+    await _run_after_commit(session)
+
+
+async def release_unit_of_work() -> None:
+    # не держим соединение в открытой транзакции, пока ждём Telegram (лимиты, ретраи)
+    session = _current_session.get()
+    if session is not None and session.in_transaction():
+        await commit_unit_of_work(session)
+
+
+async def _rollback(session: AsyncSession) -> None:
+    # колбэки ждали коммита данных, которых теперь не будет
+    session.info.pop("after_commit", None)
+    await session.rollback()
+
+
+async def _run_after_commit(session: AsyncSession) -> None:
+    for callback in session.info.pop("after_commit", []):
+        await callback()
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    # побочные эффекты (сброс кэшей и т.п.) только после того, как данные реально записаны
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+def get_pool_stats() -> Dict[str, int]:
+    pool = async_engine.pool
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
 
 class Base(DeclarativeBase):
 
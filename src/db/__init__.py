@@ -1,11 +1,9 @@
-from src.config import settings
-from src.db.db import DataBase
+from src.config import redis
+from src.db.role_index import RoleIndex
+from src.db.directory_cache import DirectoryCache
+from src.db.directory_bus import DirectoryBus
+from src.db.name_cache import name_cache
 
-DB = DataBase(settings=settings)
-
-cached_places: dict = {title: chat_id for title, chat_id in DB.get_places()}
-cached_employees: list = DB.get_employees_user_ids()
-cached_admins: list = DB.get_admins_user_ids()
-cached_chat_ids: list = DB.get_chat_ids()
-cached_employees_fullname_and_id: list = DB.get_employees_fullname_and_id(role="employee")
-cached_admins_fullname_and_id: list = DB.get_employees_fullname_and_id(role="admin")
\ No newline at end of file
+role_index = RoleIndex()
+directory_cache = DirectoryCache(index=role_index)
+directory_bus = DirectoryBus(redis=redis, cache=directory_cache, names=name_cache)
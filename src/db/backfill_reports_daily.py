@@ -0,0 +1,15 @@
+import asyncio
+import sys
+
+from src.db.queries.dao.dao import AsyncOrm
+
+
+# Пересобрать reports_daily из reports:
+#   python -m src.db.backfill_reports_daily
+async def main() -> None:
+    rows = await AsyncOrm.backfill_reports_daily()
+    print(f"reports_daily пересобрана, строк: {rows}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict
+
+from redis.asyncio import Redis
+
+from src.db.directory_cache import DirectoryCache
+from src.db.name_cache import NameCache
+
+CHANNEL = "directory:events"
+
+
+class DirectoryBus:
+    def __init__(self, redis: Redis, cache: DirectoryCache, names: NameCache) -> None:
+        self._redis = redis
+        self._cache = cache
+        self._names = names
+        # свои события уже применены локально, их повторно не применяем
+        self._origin = uuid.uuid4().hex
+        self._logger = logging.getLogger(__name__)
+
+    async def set_person(self, user_id: int, fullname: str, role: str) -> None:
+        await self._emit({"op": "set_person", "user_id": int(user_id), "fullname": fullname, "role": role})
+
+    async def remove_person(self, user_id: int) -> None:
+        await self._emit({"op": "remove_person", "user_id": int(user_id)})
+
+    async def set_place(self, title: str, chat_id: int) -> None:
+        await self._emit({"op": "set_place", "title": title, "chat_id": int(chat_id)})
+
+    async def remove_place(self, title: str) -> None:
+        await self._emit({"op": "remove_place", "title": title})
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+
+                    # пока были отписаны, могли пропустить события,
+                    # поэтому после (пере)подписки перечитываем справочник
+                    await self._cache.reload()
+                    self._names.clear_local()
+
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+
+                        event = json.loads(message["data"])
+                        if event.get("origin") == self._origin:
+                            continue
+
+                        self._apply(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._logger.exception("Ошибка в подписке на изменения справочника")
+                await asyncio.sleep(5)
+
+    async def _emit(self, event: Dict[str, Any]) -> None:
+        self._apply(event)
+
+        try:
+            await self._redis.publish(CHANNEL, json.dumps({**event, "origin": self._origin}))
+        except Exception:
+            # локальный кэш уже обновлён, остальные процессы догонят при периодической перезагрузке
+            self._logger.exception("Не удалось опубликовать изменение справочника")
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        op = event["op"]
+
+        if op == "set_person":
+            self._cache.set_person(user_id=event["user_id"], fullname=event["fullname"], role=event["role"])
+            self._names.put_local(user_id=event["user_id"], fullname=event["fullname"])
+        elif op == "remove_person":
+            self._cache.remove_person(user_id=event["user_id"])
+            self._names.drop_local(user_id=event["user_id"])
+        elif op == "set_place":
+            self._cache.set_place(title=event["title"], chat_id=event["chat_id"])
+        elif op == "remove_place":
+            self._cache.remove_place(title=event["title"])
+        else:
+            self._logger.warning("Неизвестное событие справочника: %s", event)
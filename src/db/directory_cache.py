@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from src.db.queries.dao.dao import AsyncOrm
+from src.db.role_index import RoleIndex
+
+
+class DirectoryCache:
+    def __init__(self, index: RoleIndex) -> None:
+        self._index = index
+        # user_id -> (fullname, role)
+        self._people: Dict[int, Tuple[str, str]] = {}
+        # title -> chat_id
+        self._places: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    async def reload(self) -> None:
+        async with self._lock:
+            people: Dict[int, Tuple[str, str]] = {}
+            places: Dict[str, int] = {}
+
+            for name, ident, role in await AsyncOrm.get_directory():
+                if role == "place":
+                    places[name] = int(ident)
+                else:
+                    people[int(ident)] = (name, role)
+
+            # подменяем словари целиком, чтобы читатели
+            # никогда не видели наполовину загруженный справочник
+            self._people = people
+            self._places = places
+            self._index.rebuild(people=people, places=places)
+
+    async def run_periodic_reload(self, interval_seconds: int) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.reload()
+            except Exception:
+                self._logger.exception("Ошибка при обновлении справочника")
+
+    # ---------- чтение ----------
+
+    def get_places(self) -> Dict[str, int]:
+        return dict(self._places)
+
+    def get_chat_ids(self) -> List[int]:
+        return list(self._places.values())
+
+    def get_employees_user_ids(self) -> List[int]:
+        return self._user_ids_by_role(role="employee")
+
+    def get_admins_user_ids(self) -> List[int]:
+        return self._user_ids_by_role(role="admin")
+
+    def get_employees_fullname_and_id(self) -> List[Tuple[str, int]]:
+        return self._fullname_and_id_by_role(role="employee")
+
+    def get_admins_fullname_and_id(self) -> List[Tuple[str, int]]:
+        return self._fullname_and_id_by_role(role="admin")
+
+    def get_fullnames(self) -> Dict[int, str]:
+        return {user_id: fullname for user_id, (fullname, _) in self._people.items()}
+
+    def _user_ids_by_role(self, role: str) -> List[int]:
+        return [user_id for user_id, (_, user_role) in self._people.items() if user_role == role]
+
+    def _fullname_and_id_by_role(self, role: str) -> List[Tuple[str, int]]:
+        return [(fullname, user_id) for user_id, (fullname, user_role) in self._people.items() if user_role == role]
+
+    # ---------- локальные изменения после действий админа ----------
+
+    def set_person(self, user_id: int, fullname: str, role: str) -> None:
+        people = dict(self._people)
+        people[int(user_id)] = (fullname, role)
+        self._people = people
+        self._index.rebuild(people=self._people, places=self._places)
+
+    def remove_person(self, user_id: int) -> None:
+        people = dict(self._people)
+        people.pop(int(user_id), None)
+        self._people = people
+        self._index.rebuild(people=self._people, places=self._places)
+
+    def set_place(self, title: str, chat_id: int) -> None:
+        # chat_id уникален в БД: при переименовании точки старое название нужно убрать
+        places = {t: c for t, c in self._places.items() if c != int(chat_id)}
+        places[title] = int(chat_id)
+        self._places = places
+        self._index.rebuild(people=self._people, places=self._places)
+
+    def remove_place(self, title: str) -> None:
+        places = dict(self._places)
+        places.pop(title, None)
+        self._places = places
+        self._index.rebuild(people=self._people, places=self._places)
@@ -0,0 +1,122 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+
+from src.config import redis
+from src.database import unit_of_work
+from src.db.queries.models.models import Employees
+
+# user_id -> fullname всех сотрудников и админов, общий для всех процессов бота
+NAMES_KEY = "employees:names"
+
+
+class NameCache:
+    # имена нужны при каждом отчёте, а меняются только из админки:
+    # локальный LRU -> Redis -> БД, запись в AsyncOrm.add_employee/add_admin идёт сразу в оба кэша
+    def __init__(self, redis: Redis, maxsize: int = 1024) -> None:
+        self._redis = redis
+        self._maxsize = maxsize
+        self._local: "OrderedDict[int, str]" = OrderedDict()
+        self._logger = logging.getLogger(__name__)
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: int) -> str:
+        user_id = int(user_id)
+
+        fullname = self._local.get(user_id)
+        if fullname is not None:
+            self._local.move_to_end(user_id)
+            self.hits += 1
+            return fullname
+
+        fullname = await self._get_from_redis(user_id)
+        if fullname is not None:
+            self.redis_hits += 1
+        else:
+            self.misses += 1
+            fullname = await self._get_from_db(user_id)
+            await self._set_to_redis(user_id, fullname)
+
+        self.put_local(user_id, fullname)
+        return fullname
+
+    async def set(self, user_id: int, fullname: str) -> None:
+        self.put_local(user_id, fullname)
+        await self._set_to_redis(int(user_id), fullname)
+
+    async def remove(self, user_id: int) -> None:
+        self.drop_local(user_id)
+        try:
+            await self._redis.hdel(NAMES_KEY, int(user_id))
+        except Exception:
+            self._logger.exception("Не удалось удалить имя сотрудника из Redis")
+
+    async def warm(self, names: Dict[int, str]) -> None:
+        # при старте заливаем в Redis все имена из справочника одним HSET
+        if not names:
+            return
+        try:
+            await self._redis.hset(NAMES_KEY, mapping={int(user_id): fullname for user_id, fullname in names.items()})
+        except Exception:
+            self._logger.exception("Не удалось заполнить кэш имён сотрудников")
+
+    # ---------- только локальный LRU (события из других процессов) ----------
+
+    def put_local(self, user_id: int, fullname: str) -> None:
+        self._local[int(user_id)] = fullname
+        self._local.move_to_end(int(user_id))
+        while len(self._local) > self._maxsize:
+            self._local.popitem(last=False)
+
+    def drop_local(self, user_id: int) -> None:
+        self._local.pop(int(user_id), None)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._local),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+        }
+
+    async def _get_from_redis(self, user_id: int) -> Optional[str]:
+        try:
+            value = await self._redis.hget(NAMES_KEY, user_id)
+        except Exception:
+            self._logger.exception("Не удалось прочитать имя сотрудника из Redis")
+            return None
+
+        return value.decode() if value is not None else None
+
+    async def _set_to_redis(self, user_id: int, fullname: str) -> None:
+        try:
+            await self._redis.hset(NAMES_KEY, user_id, fullname)
+        except Exception:
+            # локальный кэш уже обновлён, Redis догонит при следующем промахе
+            self._logger.exception("Не удалось записать имя сотрудника в Redis")
+
+    @staticmethod
+    async def _get_from_db(user_id: int) -> str:
+        async with unit_of_work() as session:
+            query = (
+                select(
+                    Employees.fullname
+                )
+                .select_from(Employees)
+                .filter_by(user_id=user_id)
+            )
+
+            res = await session.execute(query)
+            return res.scalars().one()
+
+
+name_cache = NameCache(redis=redis)
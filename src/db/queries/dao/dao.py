@@ -1,13 +1,15 @@
-from sqlalchemy import select, update, and_, func, delete
-from sqlalchemy import Numeric
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, update, and_, func, delete, literal, literal_column, union_all, cast, BigInteger
 from sqlalchemy.dialects.postgresql import insert
 
 from src.config import settings
-from src.database import async_engine, async_session, Base
-from src.db.queries.models.models import Employees, Places, Reports, Finances
+from src.database import async_engine, async_session, unit_of_work, after_commit, commit_unit_of_work, Base
+from src.db.queries.models.models import Employees, Places, Reports, Finances, ReportsDaily, OutboxDeliveries
+from src.db.stats_cache import stats_cache
+from src.db.name_cache import name_cache
 
 from datetime import datetime, timedelta, timezone, date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
 
 
 class AsyncOrm:
@@ -18,25 +20,29 @@ class AsyncOrm:
             await conn.run_sync(Base.metadata.create_all)
 
     @staticmethod
-    async def get_current_name(user_id: int):
-        async with async_session() as session:
-            query = (
+    async def get_directory():
+        async with unit_of_work() as session:
+            # сотрудники, админы и точки одним запросом:
+            # (fullname | title, user_id | chat_id, role | 'place')
+            query = union_all(
                 select(
-                    Employees.fullname
-                )
-                .select_from(Employees)
-                .filter_by(user_id=user_id)
+                    Employees.fullname,
+                    Employees.user_id,
+                    Employees.role,
+                ),
+                select(
+                    Places.title,
+                    Places.chat_id,
+                    literal("place"),
+                ),
             )
-
             res = await session.execute(query)
-            result = res.scalars().one()  # тут будет записано имя
 
-            await session.commit()
-            return result
+            return res.all()
 
     @staticmethod
     async def add_employee(fullname: str, user_id: int, username: str):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             stmt = (
                 insert(Employees)
                 .values(fullname=fullname, user_id=user_id, username=username, role="employee")
@@ -46,11 +52,13 @@ class AsyncOrm:
                 set_=dict(fullname=fullname, username=username, role="employee")
             )
             await session.execute(stmt)
-            await session.commit()
+
+            # имя в отчётах берётся из name_cache, обновляем его сразу после записи
+            after_commit(session, lambda: name_cache.set(user_id=user_id, fullname=fullname))
 
     @staticmethod
     async def add_admin(fullname: str, user_id: int, username: str):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             stmt = (
                 insert(Employees)
                 .values(fullname=fullname, user_id=user_id, username=username, role="admin")
@@ -60,11 +68,13 @@ class AsyncOrm:
                 set_=dict(fullname=fullname, username=username, role="admin")
             )
             await session.execute(stmt)
-            await session.commit()
+
+            # имя в отчётах берётся из name_cache, обновляем его сразу после записи
+            after_commit(session, lambda: name_cache.set(user_id=user_id, fullname=fullname))
 
     @staticmethod
     async def add_place(title: str, chat_id: int):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             stmt = (
                 insert(Places)
                 .values(title=title, chat_id=chat_id)
@@ -74,11 +84,10 @@ class AsyncOrm:
                 set_=dict(title=title)
             )
             await session.execute(stmt)
-            await session.commit()
 
     @staticmethod
     async def get_employees():
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(
                     Employees.fullname,
@@ -90,12 +99,11 @@ class AsyncOrm:
             res = await session.execute(query)
             result = [(data[0], data[1]) for data in res.all()]
 
-            await session.commit()
             return result
 
     @staticmethod
     async def get_employee_by_id(user_id: int):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(
                     Employees.fullname,
@@ -110,12 +118,11 @@ class AsyncOrm:
             res = await session.execute(query)
             result = [data for data in res.one()]
 
-            await session.commit()
             return result
 
     @staticmethod
     async def get_admins():
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(
                     Employees.fullname,
@@ -127,12 +134,11 @@ class AsyncOrm:
             res = await session.execute(query)
             result = [(data[0], data[1]) for data in res.all()]
 
-            await session.commit()
             return result
 
     @staticmethod
     async def get_admin_by_id(user_id: int):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(
                     Employees.fullname,
@@ -147,12 +153,11 @@ class AsyncOrm:
             res = await session.execute(query)
             result = [data for data in res.one()]
 
-            await session.commit()
             return result
 
     @staticmethod
     async def delete_employee(fullname: str, username: str):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             employee_query = (
                 delete(Employees)
                 .filter_by(
@@ -160,13 +165,16 @@ class AsyncOrm:
                     username=username,
                     role="employee",
                 )
+                .returning(Employees.user_id)
             )
-            await session.execute(employee_query)
-            await session.commit()
+            res = await session.execute(employee_query)
+
+            for user_id in res.scalars().all():
+                after_commit(session, lambda user_id=user_id: name_cache.remove(user_id=user_id))
 
     @staticmethod
     async def delete_admin(fullname: str, username: str):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             admin_query = (
                 delete(Employees)
                 .filter_by(
@@ -174,23 +182,25 @@ class AsyncOrm:
                     username=username,
                     role="admin",
                 )
+                .returning(Employees.user_id)
             )
-            await session.execute(admin_query)
-            await session.commit()
+            res = await session.execute(admin_query)
+
+            for user_id in res.scalars().all():
+                after_commit(session, lambda user_id=user_id: name_cache.remove(user_id=user_id))
 
     @staticmethod
     async def delete_place(title: str):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             place_query = (
                 delete(Places)
                 .filter_by(title=title)
             )
             await session.execute(place_query)
-            await session.commit()
 
     @staticmethod
-    async def set_data_to_reports(user_id: int, place: str, visitors: int, revenue: float):
-        async with async_session() as session:
+    async def set_data_to_reports(user_id: int, place: str, visitors: int, revenue: Decimal):
+        async with unit_of_work() as session:
             employee_query = (
                 select(Employees.id).
                 filter_by(user_id=user_id)
@@ -206,77 +216,345 @@ class AsyncOrm:
                 values(
                     {
                         "revenue": revenue,
-                        "place_id": place_query,
-                        "user_id": employee_query,
+                        "place_id": place_query.scalar_subquery(),
+                        "user_id": employee_query.scalar_subquery(),
                         "visitors": visitors,
                     }
                 )
+                .returning(Reports.id, Reports.report_date, Reports.place_id, Reports.user_id)
+            )
+
+            res = await session.execute(stmt)
+            report_id, report_date, place_id, employee_id = res.one()
+
+            # в той же транзакции дописываем отчёт в дневную сводку
+            stmt = (
+                insert(ReportsDaily)
+                .values(
+                    report_date=report_date,
+                    place_id=place_id or 0,
+                    user_id=employee_id or 0,
+                    visitors=visitors,
+                    revenue=revenue,
+                )
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ReportsDaily.report_date, ReportsDaily.place_id, ReportsDaily.user_id],
+                set_={
+                    "visitors": ReportsDaily.visitors + stmt.excluded.visitors,
+                    "revenue": ReportsDaily.revenue + stmt.excluded.revenue,
+                },
             )
 
             await session.execute(stmt)
-            await session.commit()
+
+            after_commit(session, lambda: stats_cache.invalidate(report_date=report_date))
+
+            return report_id
+
+    @staticmethod
+    async def set_data_to_reports_with_deliveries(
+            user_id: int,
+            place: str,
+            visitors: int,
+            revenue: Decimal,
+            chat_id: int,
+            deliveries: List[Dict[str, Any]],
+    ):
+        async with unit_of_work() as session:
+            report_id = await AsyncOrm.set_data_to_reports(
+                user_id=user_id,
+                place=place,
+                visitors=visitors,
+                revenue=revenue,
+            )
+
+            # deliveries: [{"method": ..., "payload": {...}}] в порядке отправки
+            await session.execute(
+                insert(OutboxDeliveries),
+                [
+                    {
+                        "report_id": report_id,
+                        "chat_id": chat_id,
+                        "method": delivery["method"],
+                        "payload": delivery["payload"],
+                    }
+                    for delivery in deliveries
+                ],
+            )
+
+            # отчёт и его отправки должны лечь в БД до того, как сотруднику ответят "отправлено"
+            await commit_unit_of_work(session)
+
+            return report_id
+
+    @staticmethod
+    async def add_outbox_deliveries(deliveries: List[Dict[str, Any]]):
+        async with unit_of_work() as session:
+            # deliveries: [{"report_id", "chat_id", "method", "payload"}] в порядке отправки
+            if deliveries:
+                await session.execute(insert(OutboxDeliveries), deliveries)
+
+    @staticmethod
+    async def claim_outbox_deliveries(batch_size: int, lease_seconds: int):
+        async with unit_of_work() as session:
+            # отчёты, у которых подошла очередь; чужие (заблокированные другим процессом) пропускаем
+            due_reports = (
+                select(OutboxDeliveries.report_id)
+                .filter(
+                    OutboxDeliveries.status == "pending",
+                    OutboxDeliveries.next_attempt_at <= func.now(),
+                )
+                .order_by(OutboxDeliveries.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+
+            # забираем все ожидающие отправки этих отчётов в аренду на lease_seconds:
+            # если процесс упадёт посреди отправки, по истечении аренды их подхватит другой
+            stmt = (
+                update(OutboxDeliveries)
+                .where(
+                    OutboxDeliveries.report_id.in_(due_reports.scalar_subquery()),
+                    OutboxDeliveries.status == "pending",
+                    OutboxDeliveries.next_attempt_at <= func.now(),
+                )
+                .values(next_attempt_at=func.now() + timedelta(seconds=lease_seconds))
+                .returning(
+                    OutboxDeliveries.id,
+                    OutboxDeliveries.report_id,
+                    OutboxDeliveries.chat_id,
+                    OutboxDeliveries.method,
+                    OutboxDeliveries.payload,
+                    OutboxDeliveries.attempts,
+                    OutboxDeliveries.created_at,
+                )
+            )
+            res = await session.execute(stmt)
+
+            # returns List[id, report_id, chat_id, method, payload, attempts, created_at] по порядку отправки
+            return sorted(res.all(), key=lambda row: (row.report_id, row.id))
+
+    @staticmethod
+    async def mark_outbox_delivery_sent(delivery_id: int):
+        async with unit_of_work() as session:
+            stmt = (
+                update(OutboxDeliveries)
+                .filter_by(id=delivery_id)
+                .values(status="sent", last_error=None)
+            )
+            await session.execute(stmt)
+
+    @staticmethod
+    async def mark_outbox_delivery_failed(delivery_id: int, error: str):
+        async with unit_of_work() as session:
+            stmt = (
+                update(OutboxDeliveries)
+                .filter_by(id=delivery_id)
+                .values(status="failed", attempts=OutboxDeliveries.attempts + 1, last_error=error)
+            )
+            await session.execute(stmt)
+
+    @staticmethod
+    async def reschedule_outbox_deliveries(report_id: int, from_delivery_id: int, delay_seconds: int, error: str):
+        async with unit_of_work() as session:
+            # следующие сообщения отчёта ждут вместе с неотправленным, чтобы не нарушить порядок
+            stmt = (
+                update(OutboxDeliveries)
+                .where(
+                    OutboxDeliveries.report_id == report_id,
+                    OutboxDeliveries.id >= from_delivery_id,
+                    OutboxDeliveries.status == "pending",
+                )
+                .values(next_attempt_at=func.now() + timedelta(seconds=delay_seconds))
+            )
+            await session.execute(stmt)
+
+            stmt = (
+                update(OutboxDeliveries)
+                .filter_by(id=from_delivery_id)
+                .values(attempts=OutboxDeliveries.attempts + 1, last_error=error)
+            )
+            await session.execute(stmt)
+
+    @staticmethod
+    async def get_outbox_backlog():
+        async with unit_of_work() as session:
+            query = (
+                select(
+                    func.count(),
+                    func.min(OutboxDeliveries.created_at),
+                )
+                .select_from(OutboxDeliveries)
+                .filter(OutboxDeliveries.status == "pending")
+            )
+            res = await session.execute(query)
+
+            # returns [количество ожидающих отправок, created_at самой старой]
+            return res.one()
+
+    @staticmethod
+    async def backfill_reports_daily():
+        async with unit_of_work() as session:
+            # пересобирает сводку целиком из reports
+            await session.execute(delete(ReportsDaily))
+
+            # 0 - литерал, а не параметр: иначе в SELECT и GROUP BY окажутся разные $n,
+            # и Postgres не признает выражения одинаковыми
+            place_id = func.coalesce(Reports.place_id, literal_column("0"))
+            user_id = func.coalesce(Reports.user_id, literal_column("0"))
+
+            stmt = (
+                insert(ReportsDaily)
+                .from_select(
+                    ["report_date", "place_id", "user_id", "visitors", "revenue"],
+                    select(
+                        Reports.report_date,
+                        place_id,
+                        user_id,
+                        func.sum(Reports.visitors),
+                        func.sum(Reports.revenue),
+                    )
+                    .group_by(
+                        Reports.report_date,
+                        place_id,
+                        user_id,
+                    )
+                )
+            )
+            res = await session.execute(stmt)
+
+            after_commit(session, stats_cache.clear)
+
+        return res.rowcount
 
     @staticmethod
     async def get_visitors_data_from_reports_by_date(date_from: date, date_to: date):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(
                     Places.title,
                     Employees.fullname,
-                    Reports.user_id,
-                    func.sum(Reports.visitors),
+                    ReportsDaily.user_id,
+                    # sum(BIGINT) в Postgres - numeric, asyncpg отдаёт Decimal; строки статистики
+                    # лежат в FSM и stats_cache как JSON, поэтому приводим обратно к целому
+                    cast(func.sum(ReportsDaily.visitors), BigInteger),
                 )
-                .select_from(Reports)
-                .join(Reports.place)
-                .join(Reports.employee)
+                .select_from(ReportsDaily)
+                .join(Places, Places.id == ReportsDaily.place_id)
+                .join(Employees, Employees.id == ReportsDaily.user_id)
                 .filter(
-                    Reports.report_date.between(date_from, date_to)
+                    ReportsDaily.report_date.between(date_from, date_to)
                 )
                 .group_by(
                     Places.title,
                     Employees.fullname,
-                    Reports.user_id,
+                    ReportsDaily.user_id,
                 )
                 .order_by(Places.title)
             )
             res = await session.execute(query)
-            await session.commit()
 
             # returns List[places.title, employees.fullname, reports.user_id, sum of visitors]
             return res.all()
 
     @staticmethod
     async def get_revenue_data_from_reports_by_date(date_from: date, date_to: date):
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(
                     func.coalesce(Places.title, 'удаленная точка'),
                     func.coalesce(Employees.fullname, 'удаленный сотр.'),
-                    Reports.user_id,
-                    func.concat(func.sum(func.cast(Reports.revenue, Numeric))),
+                    ReportsDaily.user_id,
+                    func.sum(ReportsDaily.revenue),
                 )
-                .select_from(Reports)
-                .join(Reports.place, isouter=True)
-                .join(Reports.employee, isouter=True)
+                .select_from(ReportsDaily)
+                .join(Places, Places.id == ReportsDaily.place_id, isouter=True)
+                .join(Employees, Employees.id == ReportsDaily.user_id, isouter=True)
                 .filter(
-                    Reports.report_date.between(date_from, date_to),
+                    ReportsDaily.report_date.between(date_from, date_to),
                 )
                 .group_by(
                     Places.title,
                     Employees.fullname,
-                    Reports.user_id,
+                    ReportsDaily.user_id,
                 )
-                .order_by(Reports.user_id)
+                .order_by(ReportsDaily.user_id)
             )
             res = await session.execute(query)
-            await session.commit()
 
-            # returns List[places.title, employees.fullname, reports.user_id, sum of revenue]
+            # returns List[places.title, employees.fullname, reports.user_id, sum of revenue (Decimal)]
             return res.all()
 
     @staticmethod
-    async def set_data_to_finances_default():
+    async def get_drilldown_data_from_reports_by_date(
+            date_from: date,
+            date_to: date,
+            place_chat_id: Optional[int] = None,
+            employee_user_id: Optional[int] = None,
+    ):
+        async with unit_of_work() as session:
+            # одна точка - разбивка по дням, один сотрудник - разбивка по точкам
+            if place_chat_id is not None:
+                group = ReportsDaily.report_date
+                condition = Places.chat_id == place_chat_id
+            else:
+                group = func.coalesce(Places.title, 'удаленная точка')
+                condition = Employees.user_id == employee_user_id
+
+            query = (
+                select(
+                    group,
+                    cast(func.sum(ReportsDaily.visitors), BigInteger),
+                    func.sum(ReportsDaily.revenue),
+                )
+                .select_from(ReportsDaily)
+                .join(Places, Places.id == ReportsDaily.place_id, isouter=True)
+                .join(Employees, Employees.id == ReportsDaily.user_id, isouter=True)
+                .filter(
+                    ReportsDaily.report_date.between(date_from, date_to),
+                    condition,
+                )
+                .group_by(group)
+                .order_by(group)
+            )
+            res = await session.execute(query)
+
+            # returns List[report_date | places.title, sum of visitors, sum of revenue]
+            return res.all()
+
+    @staticmethod
+    async def stream_reports_by_date(date_from: date, date_to: date, batch_size: int = 1000):
+        # серверному курсору отдельная сессия: пока идёт выгрузка,
+        # общая сессия апдейта остаётся свободной для других запросов
         async with async_session() as session:
+            query = (
+                select(
+                    Reports.report_date,
+                    func.coalesce(Places.title, 'удаленная точка'),
+                    func.coalesce(Employees.fullname, 'удаленный сотр.'),
+                    Reports.visitors,
+                    Reports.revenue,
+                )
+                .select_from(Reports)
+                .join(Reports.place, isouter=True)
+                .join(Reports.employee, isouter=True)
+                .filter(
+                    Reports.report_date.between(date_from, date_to),
+                )
+                .order_by(Reports.report_date, Reports.id)
+                .execution_options(yield_per=batch_size)
+            )
+
+            # серверный курсор: в памяти одновременно не больше batch_size строк
+            result = await session.stream(query)
+            async for row in result:
+                # yields [report_date, places.title, employees.fullname, visitors, revenue]
+                yield row
+
+    @staticmethod
+    async def set_data_to_finances_default():
+        async with unit_of_work() as session:
             time_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
             time_N_days_ago = time_now - timedelta(days=settings.DAYS_FOR_FINANCES_CHECK) + timedelta(days=1)
 
@@ -293,7 +571,7 @@ class AsyncOrm:
             )
 
             res = await session.execute(sum_of_revenue_query)
-            data_from_reports = {int(place_id): float(summary) for place_id, summary in res.all()}
+            data_from_reports = {int(place_id): summary for place_id, summary in res.all()}
 
             # На этом этапе я получил новые выручки
             # за прошлые N дней
@@ -319,147 +597,75 @@ class AsyncOrm:
             )
 
             await session.execute(stmt)
-            await session.commit()
 
             # Выхожу из метода, так как нет смысла делать что-либо дальше
             # Я обновил всё, что можно на данный момент
-            await session.commit()
             return
 
     @staticmethod
-    async def set_data_to_finances_by_place(place_id: int):
-        async with async_session() as session:
+    async def rollover_finances():
+        async with unit_of_work() as session:
             time_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
             time_N_days_ago = time_now - timedelta(days=settings.DAYS_FOR_FINANCES_CHECK) + timedelta(days=1)
 
-            sum_of_revenue_query = (
+            revenue_query = (
                 select(
                     Reports.place_id,
-                    func.sum(Reports.revenue)
+                    func.sum(Reports.revenue).label("revenue"),
                 )
                 .select_from(Reports)
                 .filter(
-                    and_(Reports.report_date.between(time_N_days_ago, time_now), Reports.place_id == place_id)
+                    Reports.report_date.between(time_N_days_ago, time_now)
                 )
                 .group_by(Reports.place_id)
+                .subquery()
             )
 
-            res = await session.execute(sum_of_revenue_query)
-            data_from_reports = {int(place_id): float(summary) for place_id, summary in res.all()}
-
-            # если такой точки еще не было в Finances,
-            # то ее нужно там создать, а далее выйти из функции
-            if not await AsyncOrm._check_finances_for_null_by_place(place_id=place_id):
-                stmt = (
-                    insert(Finances)
-                    .values(
-                        [
-                            {"place_id": place_id, "updated_money": updated_money, "last_money": 0}
-                            for place_id, updated_money in data_from_reports.items()
-                        ]
-                    )
-                )
-                await session.execute(stmt)
-                await session.commit()
-                return
-
-            last_updated_money_query = (
+            # точки, у которых с прошлого отчёта прошло N дней,
+            # вместе со старым updated_at (UPDATE ... FROM видит строки до изменения)
+            due_query = (
                 select(
-                    Finances.updated_money
+                    Finances.place_id,
+                    Finances.updated_at.label("last_updated_at"),
+                    Places.title,
+                    Places.chat_id,
+                    func.coalesce(revenue_query.c.revenue, 0).label("revenue"),
                 )
                 .select_from(Finances)
-                .filter_by(place_id=place_id)
-            )
-            res = await session.execute(last_updated_money_query)
-            data_from_finances_for_place = {
-                "place_id": place_id, "last_money": float(res.scalar()),
-            }
-
-            # На данном этапе я получил старое
-            # значение updated_money для конкретной точки, чтобы
-            # вставить их в last_money для этой же точки
-            await session.flush()
-
-            stmt = (
-                insert(Finances)
-                .values(data_from_finances_for_place)
-                .on_conflict_do_update(
-                    index_elements=[Finances.place_id],
-                    set_={
-                        "last_money": insert(Finances).excluded.last_money,
-                    }
+                .join(Places, Finances.place_id == Places.id)
+                .outerjoin(revenue_query, revenue_query.c.place_id == Finances.place_id)
+                .filter(
+                    Finances.updated_at <= time_now - timedelta(days=settings.DAYS_FOR_FINANCES_CHECK)
                 )
+                .subquery()
             )
-            await session.execute(stmt)
-
-            # На этом этапе last_money содержит
-            # старое значение updated_money
-            #
-            # Теперь мне нужно в updated_money
-            # вставить новое значение, которые пришло
-            # из таблицы Reports (новые выручки точки за прошлые N дней)
-            await session.flush()
 
+            # last_money <- старое updated_money, updated_money <- выручка за N дней,
+            # всё одним запросом для всех точек сразу
             stmt = (
-                insert(Finances)
+                update(Finances)
+                .where(Finances.place_id == due_query.c.place_id)
                 .values(
-                    [
-                        {"place_id": place_id, "updated_money": updated_money}
-                        for place_id, updated_money in data_from_reports.items()
-                    ]
+                    last_money=Finances.updated_money,
+                    updated_money=due_query.c.revenue,
+                    updated_at=time_now,
                 )
-                .on_conflict_do_update(
-                    index_elements=[Finances.place_id],
-                    set_={
-                        "updated_money": insert(Finances).excluded.updated_money,
-                    },
+                .returning(
+                    Finances.place_id,
+                    due_query.c.title,
+                    Finances.last_money,
+                    Finances.updated_money,
+                    due_query.c.last_updated_at,
                 )
             )
+            res = await session.execute(stmt)
 
-            # Я обновил updated_money новым значением,
-            # и теперь можно спокойно выходить из функции
-            await session.execute(stmt)
-            await session.commit()
-
-    @staticmethod
-    async def get_data_from_finances_by_place(place_id: int):
-        async with async_session() as session:
-            time_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
-
-            query = (
-                select(
-                    Finances,
-                )
-                .select_from(Finances)
-                .filter_by(place_id=place_id)
-                .options(joinedload(Finances.place))
-            )
-
-            res = await session.execute(query)
-            result = [
-                (
-                    data.place.title,
-                    data.place.chat_id,
-                    data.last_money,
-                    data.updated_money,
-                    data.updated_at,
-                ) for data in res.scalars().all()
-            ]
-
-            # обновлю дату updated_at в Finances, так как я получил
-            # и вывел всю старую нужную информацию в этой функции
-
-            stmt = (
-                update(Finances).values(updated_at=time_now).filter_by(place_id=place_id)
-            )
-            await session.execute(stmt)
-            await session.commit()
-
-            return result
+            # returns List[place_id, places.title, last_money, updated_money, прошлый updated_at]
+            return res.all()
 
     @staticmethod
     async def _check_data_from_finances():
-        async with async_session() as session:
+        async with unit_of_work() as session:
             # если таблица Finances пустая, то заполняю ее дефолтными значениями
             if not await AsyncOrm._check_finances_for_null():
                 await AsyncOrm.set_data_to_finances_default()
@@ -475,25 +681,11 @@ class AsyncOrm:
             res = await session.execute(query)
             result = res.all()
 
-            await session.commit()
             return result
 
-    @staticmethod
-    async def _check_finances_for_null_by_place(place_id: int):
-        async with async_session() as session:
-            query = (
-                select(Finances)
-                .select_from(Finances)
-                .filter_by(place_id=place_id)
-            )
-            res = await session.execute(query)
-            await session.commit()
-
-            return res.scalars().all()
-
     @staticmethod
     async def _check_finances_for_null():
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select("*")
                 .select_from(Finances)
@@ -504,11 +696,10 @@ class AsyncOrm:
 
     @staticmethod
     async def _check_reports_for_null():
-        async with async_session() as session:
+        async with unit_of_work() as session:
             query = (
                 select(Reports)
             )
             res = await session.execute(query)
-            await session.commit()
 
             return res.scalars().all()
\ No newline at end of file
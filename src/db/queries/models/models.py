@@ -1,11 +1,15 @@
-from sqlalchemy.dialects.postgresql import BIGINT, INTEGER, DATE
+from sqlalchemy.dialects.postgresql import BIGINT, INTEGER, DATE, JSONB, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import text, ForeignKey
+from sqlalchemy import text, func, ForeignKey, Index, Numeric
 
 from src.database import Base
 
 from typing import Annotated, Optional
-from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from datetime import datetime, timezone, timedelta, date
+
+# деньги храним точно, без ошибок округления float
+money = Annotated[Decimal, mapped_column(Numeric(14, 2), default=0)]
 
 created_at = Annotated[datetime, mapped_column(
     DATE,
@@ -20,6 +24,9 @@ updated_at = Annotated[datetime, mapped_column(
 
 class Employees(Base):
     __tablename__ = "employees"
+    __table_args__ = (
+        Index("ix_employees_role", "role"),
+    )
 
     id = mapped_column(INTEGER, primary_key=True)
     fullname: Mapped[str]
@@ -38,8 +45,8 @@ class Finances(Base):
     id = mapped_column(INTEGER, primary_key=True)
     place_id: Mapped[int] = mapped_column(ForeignKey("places.id"), unique=True)
     updated_at: Mapped[updated_at]
-    last_money: Mapped[float] = mapped_column(default=0.0)
-    updated_money: Mapped[float] = mapped_column(default=0.0)
+    last_money: Mapped[money]
+    updated_money: Mapped[money]
 
     # one-2-one bound with Places-table
     place: Mapped["Places"] = relationship(back_populates="finance", uselist=False)
@@ -61,11 +68,16 @@ class Places(Base):
 
 class Reports(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # статистика и пересчёт Finances фильтруют по диапазону дат (и точке)
+        Index("ix_reports_report_date_place_id", "report_date", "place_id"),
+        Index("ix_reports_place_id_report_date", "place_id", "report_date"),
+    )
 
     id = mapped_column(INTEGER, primary_key=True)
     report_date: Mapped[created_at]
     visitors: Mapped[int]
-    revenue: Mapped[float]
+    revenue: Mapped[money]
 
     # one-2-many bound (one place -> many reports)
     place_id: Mapped[Optional[int]] = mapped_column(ForeignKey("places.id", ondelete="SET NULL"), nullable=True)
@@ -73,4 +85,40 @@ class Reports(Base):
 
     # one-2-many bound (one employee -> many reports)
     user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("employees.id", ondelete="SET NULL"), nullable=True)
-    employee: Mapped["Employees"] = relationship(back_populates="reports", uselist=False)
\ No newline at end of file
+    employee: Mapped["Employees"] = relationship(back_populates="reports", uselist=False)
+
+
+class ReportsDaily(Base):
+    __tablename__ = "reports_daily"
+
+    # дневная сводка по reports для статистики, ведётся в AsyncOrm.set_data_to_reports;
+    # без внешних ключей: после удаления точки/сотрудника его строки остаются,
+    # как и в reports (0 - точка/сотрудник не найдены при записи отчёта)
+    report_date: Mapped[date] = mapped_column(DATE, primary_key=True)
+    place_id: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    user_id: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    visitors: Mapped[int] = mapped_column(BIGINT, default=0)
+    revenue: Mapped[money]
+
+
+class OutboxDeliveries(Base):
+    __tablename__ = "outbox_deliveries"
+    __table_args__ = (
+        # воркер выбирает только ожидающие доставки, отправленных со временем большинство
+        Index("ix_outbox_deliveries_pending", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
+
+    # сообщения отчёта, которые ещё нужно отправить в чат точки,
+    # пишутся в одной транзакции с самим отчётом (reports.id, без внешнего ключа, как reports_daily).
+    # отчёты по выручке лежат под отрицательным report_id, см. revenue_outbox_key
+    id = mapped_column(INTEGER, primary_key=True)
+    report_id: Mapped[int] = mapped_column(INTEGER)
+    chat_id = mapped_column(BIGINT)
+    method: Mapped[str]
+    payload = mapped_column(JSONB)
+    # pending -> sent | failed
+    status: Mapped[str] = mapped_column(default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    next_attempt_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    last_error: Mapped[Optional[str]]
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -0,0 +1,72 @@
+import time
+from typing import Dict, Optional, Tuple
+
+# окно, по которому считается lookups_per_second
+RATE_WINDOW_SECONDS = 60
+
+
+class RoleIndex:
+    def __init__(self) -> None:
+        # user_id -> role ("employee" | "admin")
+        self._roles: Dict[int, str] = {}
+        # chat_id -> title рабочей точки
+        self._places: Dict[int, str] = {}
+
+        self._role_lookups = 0
+        self._chat_lookups = 0
+        self._window_started = time.monotonic()
+        self._window_lookups = 0
+        # частота за последнее закрытое окно
+        self._last_rate: Optional[float] = None
+
+    def rebuild(self, people: Dict[int, Tuple[str, str]], places: Dict[str, int]) -> None:
+        # словари подменяются целиком, фильтры читают их без блокировок
+        self._roles = {user_id: role for user_id, (_, role) in people.items()}
+        self._places = {chat_id: title for title, chat_id in places.items()}
+
+    def get_role(self, user_id: int) -> Optional[str]:
+        self._role_lookups += 1
+        self._count_lookup()
+        return self._roles.get(user_id)
+
+    def is_admin(self, user_id: int) -> bool:
+        return self.get_role(user_id) == "admin"
+
+    def is_known_user(self, user_id: int) -> bool:
+        return self.get_role(user_id) is not None
+
+    def get_place_by_chat(self, chat_id: int) -> Optional[str]:
+        self._chat_lookups += 1
+        self._count_lookup()
+        return self._places.get(chat_id)
+
+    def is_place_chat(self, chat_id: int) -> bool:
+        return self.get_place_by_chat(chat_id) is not None
+
+    def get_stats(self) -> Dict[str, float]:
+        # только чтение: /health можно дёргать сколько угодно часто, на счётчики это не влияет
+        elapsed = time.monotonic() - self._window_started
+        if self._last_rate is None or elapsed >= RATE_WINDOW_SECONDS:
+            # первое окно ещё идёт или окно истекло, но поисков с тех пор не было
+            rate = self._window_lookups / elapsed if elapsed > 0 else 0.0
+        else:
+            rate = self._last_rate
+
+        return {
+            "role_lookups": self._role_lookups,
+            "chat_lookups": self._chat_lookups,
+            "lookups_per_second": round(rate, 2),
+            "users": len(self._roles),
+            "chats": len(self._places),
+        }
+
+    def _count_lookup(self) -> None:
+        # окно закрывает сам поиск, по времени
+        now = time.monotonic()
+        elapsed = now - self._window_started
+        if elapsed >= RATE_WINDOW_SECONDS:
+            self._last_rate = self._window_lookups / elapsed
+            self._window_started = now
+            self._window_lookups = 0
+
+        self._window_lookups += 1
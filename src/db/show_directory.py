@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+
+from src.db import directory_cache
+
+
+# Справочник без запуска бота (то, что раньше отдавал DataBase на psycopg2):
+#   python -m src.db.show_directory admins|employees|places
+# загружается тем же одним запросом AsyncOrm.get_directory(), что и при старте бота
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("what", choices=("admins", "employees", "places"))
+    args = parser.parse_args()
+
+    await directory_cache.reload()
+
+    if args.what == "admins":
+        rows = directory_cache.get_admins_fullname_and_id()
+    elif args.what == "employees":
+        rows = directory_cache.get_employees_fullname_and_id()
+    else:
+        rows = list(directory_cache.get_places().items())
+
+    for name, ident in rows:
+        print(f"{ident}\t{name}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+import json
+import logging
+from datetime import date
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+from src.config import redis
+
+# все закэшированные диапазоны "kind:date_from:date_to"
+RANGES_KEY = "stats:ranges"
+# счётчик сбросов кэша: пока считаются строки, отчёт может успеть сбросить кэш,
+# и записывать такой результат уже нельзя
+GENERATION_KEY = "stats:generation"
+
+
+class StatsCache:
+    # на случай правок, которые не проходят через set_data_to_reports
+    # (удаление/переименование точки или сотрудника)
+    TTL_SECONDS = 60 * 60
+
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+        self._logger = logging.getLogger(__name__)
+
+    async def get(self, kind: str, date_from: date, date_to: date) -> Optional[Any]:
+        try:
+            value = await self._redis.get(self._key(self._member(kind, date_from, date_to)))
+        except Exception:
+            self._logger.exception("Не удалось прочитать кэш статистики")
+            return None
+
+        return json.loads(value) if value is not None else None
+
+    async def generation(self) -> Optional[int]:
+        # читать ДО запроса в БД и передать в set
+        try:
+            return int(await self._redis.get(GENERATION_KEY) or 0)
+        except Exception:
+            self._logger.exception("Не удалось прочитать кэш статистики")
+            return None
+
+    async def set(self, kind: str, date_from: date, date_to: date, value: Any, generation: Optional[int]) -> None:
+        # пишем, только если с момента generation() кэш никто не сбрасывал,
+        # иначе строки, посчитанные до нового отчёта, пролежали бы в кэше весь TTL
+        if generation is None:
+            return
+
+        member = self._member(kind, date_from, date_to)
+
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                # сброс между WATCH и EXEC отменит запись (WatchError)
+                await pipe.watch(GENERATION_KEY)
+                if int(await pipe.get(GENERATION_KEY) or 0) != generation:
+                    return
+
+                pipe.multi()
+                pipe.set(self._key(member), json.dumps(value), ex=self.TTL_SECONDS)
+                pipe.sadd(RANGES_KEY, member)
+                # набор живёт не меньше любого из своих ключей
+                pipe.expire(RANGES_KEY, self.TTL_SECONDS)
+                await pipe.execute()
+        except WatchError:
+            return
+        except Exception:
+            self._logger.exception("Не удалось записать кэш статистики")
+
+    async def invalidate(self, report_date: date) -> None:
+        # сбрасываем только диапазоны, в которые попал новый отчёт.
+        # счётчик - первым: записи, посчитанные до этого момента, уже не попадут в кэш
+        try:
+            await self._redis.incr(GENERATION_KEY)
+            stale = [
+                member for member in (m.decode() for m in await self._redis.smembers(RANGES_KEY))
+                if self._contains(member, report_date)
+            ]
+
+            if stale:
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.delete(*[self._key(member) for member in stale])
+                    pipe.srem(RANGES_KEY, *stale)
+                    await pipe.execute()
+        except Exception:
+            # отчёт уже записан, устаревший кэш сам истечёт через TTL_SECONDS
+            self._logger.exception("Не удалось сбросить кэш статистики")
+
+    async def clear(self) -> None:
+        await self._redis.incr(GENERATION_KEY)
+        members = [member.decode() for member in await self._redis.smembers(RANGES_KEY)]
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            if members:
+                pipe.delete(*[self._key(member) for member in members])
+            pipe.delete(RANGES_KEY)
+            await pipe.execute()
+
+    @staticmethod
+    def _member(kind: str, date_from: date, date_to: date) -> str:
+        return f"{kind}:{date_from.isoformat()}:{date_to.isoformat()}"
+
+    @staticmethod
+    def _contains(member: str, report_date: date) -> bool:
+        _, date_from, date_to = member.split(":")
+        return date_from <= report_date.isoformat() <= date_to
+
+    @staticmethod
+    def _key(member: str) -> str:
+        return f"stats:{member}"
+
+
+stats_cache = StatsCache(redis=redis)
@@ -1,13 +1,13 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message, CallbackQuery
-from src.db import cached_admins
+from src.db import role_index
 
 
 class IsAdminFilterMessage(BaseFilter):
     async def __call__(self, message: Message) -> bool:
-        return int(message.from_user.id) in cached_admins
+        return role_index.is_admin(int(message.from_user.id))
 
 
 class IsNotAdminFilterCallback(BaseFilter):
     async def __call__(self, callback: CallbackQuery) -> bool:
-        return not int(callback.message.chat.id) in cached_admins
\ No newline at end of file
+        return not role_index.is_admin(int(callback.message.chat.id))
\ No newline at end of file
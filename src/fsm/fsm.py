@@ -124,4 +124,10 @@ class FSMStatisticsVisitors(StatesGroup):
 
 class FSMStatisticsMoney(StatesGroup):
     in_stats = State()
-    custom_date = State()
\ No newline at end of file
+    custom_date = State()
+
+
+class FSMStatisticsDrilldown(StatesGroup):
+    choose_place = State()
+    choose_employee = State()
+    in_stats = State()
\ No newline at end of file
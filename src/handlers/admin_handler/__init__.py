@@ -10,6 +10,8 @@ from src.handlers.admin_handler.watching.place_list import router_show_places
 from src.handlers.admin_handler.statistics.statistics_menu import router_adm_stats
 from src.handlers.admin_handler.statistics.visitors_statistics import router_adm_visitors
 from src.handlers.admin_handler.statistics.money_statistics import router_adm_money
+from src.handlers.admin_handler.statistics.export_statistics import router_adm_export
+from src.handlers.admin_handler.statistics.drilldown_statistics import router_adm_drilldown
 
 __all__ = [
     "router_admin",
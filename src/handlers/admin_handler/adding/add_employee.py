@@ -3,13 +3,15 @@ from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
 from aiogram.fsm.state import default_state
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.filters.is_admin import IsAdminFilterMessage, IsNotAdminFilterCallback
 from src.keyboards.adm_keyboard import create_admin_kb, check_add_employee
 from src.keyboards.keyboard import create_cancel_kb
 from src.fsm.fsm import FSMAdmin
 from src.db.queries.dao.dao import AsyncOrm
-from src.db import cached_employees, cached_employees_fullname_and_id
+from src.db import directory_bus
+from src.database import after_commit, commit_unit_of_work
 
 router_admin = Router()
 
@@ -154,7 +156,7 @@ async def warning_add_emp_username_command(message: Message):
 
 
 @router_admin.callback_query(StateFilter(FSMAdmin.check_employee), F.data == "access_employee")
-async def process_access_emp_command(callback: CallbackQuery, state: FSMContext):
+async def process_access_emp_command(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
 
     await AsyncOrm.add_employee(
@@ -162,10 +164,13 @@ async def process_access_emp_command(callback: CallbackQuery, state: FSMContext)
         user_id=data["employee_id"],
         username=data["employee_username"],
     )
-    if data["employee_id"] not in cached_employees:
-        cached_employees.append(data["employee_id"])
-    if (data["employee_name"], data["employee_id"]) not in cached_employees_fullname_and_id:
-        cached_employees_fullname_and_id.append((data["employee_name"], data["employee_id"]))
+    # другие процессы узнают об изменении и админ видит "успешно" только после коммита
+    after_commit(session, lambda: directory_bus.set_person(
+        user_id=data["employee_id"],
+        fullname=data["employee_name"],
+        role="employee",
+    ))
+    await commit_unit_of_work(session)
 
     await callback.message.answer(
         text=f"Сотрудник <b>{data['employee_name']}</b> с id=<b>{data['employee_id']}</b> "
@@ -2,13 +2,15 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.keyboards.adm_keyboard import create_admin_list_kb, create_admin_kb, create_delete_kb
 from src.callbacks.admin import AdminCallbackFactory
 from src.fsm.fsm import FSMAdmin
 from src.handlers.admin_handler.adding.add_employee import router_admin
 from src.db.queries.dao.dao import AsyncOrm
-from src.db import cached_admins, cached_admins_fullname_and_id
+from src.db import directory_bus
+from src.database import after_commit, commit_unit_of_work
 
 router_del_adm = Router()
 router_admin.include_router(router_del_adm)
@@ -52,15 +54,16 @@ async def process_go_back_which_do_admin_delete_command(callback: CallbackQuery,
 
 
 @router_del_adm.callback_query(StateFilter(FSMAdmin.deleting_admin), F.data == "delete")
-async def process_deleting_admin_command(callback: CallbackQuery, state: FSMContext):
+async def process_deleting_admin_command(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
 
     await AsyncOrm.delete_admin(
         fullname=data["fullname"],
         username=data["username"],
     )
-    cached_admins.remove(data["user_id"])
-    cached_admins_fullname_and_id.remove((data["fullname"], data["user_id"]))
+    # другие процессы узнают об изменении и админ видит "успешно" только после коммита
+    after_commit(session, lambda: directory_bus.remove_person(user_id=data["user_id"]))
+    await commit_unit_of_work(session)
 
     await callback.message.edit_text(
         text=f"Администратор {data['fullname']} успешно удален!\n\n"
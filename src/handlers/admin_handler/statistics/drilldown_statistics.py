@@ -0,0 +1,198 @@
+from datetime import datetime, timezone, timedelta, date
+
+from aiogram.types import CallbackQuery
+from aiogram import Router, F
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+
+from src.callbacks.employee import EmployeeCallbackFactory
+from src.callbacks.place import PlaceCallbackFactory
+from src.callbacks.stats import StatsPageCallbackFactory
+from src.db.queries.dao.dao import AsyncOrm
+from src.db.stats_cache import stats_cache
+from src.fsm.fsm import FSMStatistics, FSMStatisticsDrilldown
+from src.handlers.admin_handler import router_admin
+from src.handlers.admin_handler.statistics.stats_pages import open_stats_report, turn_stats_page
+from src.keyboards.adm_keyboard import create_stats_kb, create_places_list_kb, create_employee_list_kb
+from src.utils.formatting import format_money
+from src.utils.templates import ReportTemplate
+
+router_adm_drilldown = Router()
+router_admin.include_router(router_adm_drilldown)
+
+PERIODS = {
+    "week": 7,
+    "month": 30,
+    "year": 365,
+}
+
+
+async def get_drilldown_rows(
+        target: dict,
+        date_from: date,
+        date_to: date,
+):
+    # target: {"kind": "place", "chat_id", "title"} или {"kind": "employee", "user_id", "fullname"}
+    if target["kind"] == "place":
+        cache_kind = f"place-{target['chat_id']}"
+    else:
+        cache_kind = f"employee-{target['user_id']}"
+
+    rows = await stats_cache.get(kind=cache_kind, date_from=date_from, date_to=date_to)
+    if rows is not None:
+        return rows
+
+    generation = await stats_cache.generation()
+    data = await AsyncOrm.get_drilldown_data_from_reports_by_date(
+        date_from=date_from,
+        date_to=date_to,
+        place_chat_id=target.get("chat_id"),
+        employee_user_id=target.get("user_id"),
+    )
+
+    if target["kind"] == "place":
+        group = target["title"]
+        rows = [
+            [group, report_date.strftime("%d.%m.%Y"), _format_totals(visitors, revenue)]
+            for report_date, visitors, revenue in data
+        ]
+    else:
+        group = target["fullname"]
+        rows = [
+            [group, place_title, _format_totals(visitors, revenue)]
+            for place_title, visitors, revenue in data
+        ]
+
+    await stats_cache.set(kind=cache_kind, date_from=date_from, date_to=date_to, value=rows, generation=generation)
+
+    return rows
+
+
+TOTALS_TEMPLATE = ReportTemplate("посетителей: <em>{visitors}</em>, выручка: <em>{revenue}<b>₽</b></em>")
+
+
+def _format_totals(visitors, revenue) -> str:
+    return TOTALS_TEMPLATE.render(visitors=visitors, revenue=format_money(revenue))
+
+
+async def show_drilldown(callback: CallbackQuery, state: FSMContext, period: str):
+    target = (await state.get_data())["drilldown"]
+
+    date_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
+    date_from = date_now - timedelta(days=PERIODS[period])
+
+    text, reply_markup = await open_stats_report(
+        state=state,
+        kind=target["kind"],
+        rows=await get_drilldown_rows(
+            target=target,
+            date_from=date_from,
+            date_to=date_now,
+        ),
+        date_from=date_from,
+        date_to=date_now,
+        period=period,
+    )
+    await callback.message.edit_text(
+        text=text,
+        reply_markup=reply_markup,
+        parse_mode="html",
+    )
+    await callback.answer()
+    await state.set_state(FSMStatisticsDrilldown.in_stats)
+
+
+@router_adm_drilldown.callback_query(StateFilter(FSMStatistics.in_stats), F.data == "adm_stats_place")
+async def process_adm_stats_place_command(callback: CallbackQuery, state: FSMContext):
+    await callback.message.edit_text(
+        text="Выберите рабочую точку:",
+        reply_markup=create_places_list_kb(),
+    )
+    await callback.answer()
+    await state.set_state(FSMStatisticsDrilldown.choose_place)
+
+
+@router_adm_drilldown.callback_query(StateFilter(FSMStatistics.in_stats), F.data == "adm_stats_employee")
+async def process_adm_stats_employee_command(callback: CallbackQuery, state: FSMContext):
+    await callback.message.edit_text(
+        text="Выберите сотрудника:",
+        reply_markup=create_employee_list_kb(),
+    )
+    await callback.answer()
+    await state.set_state(FSMStatisticsDrilldown.choose_employee)
+
+
+@router_adm_drilldown.callback_query(StateFilter(FSMStatisticsDrilldown.choose_place), PlaceCallbackFactory.filter())
+async def process_adm_stats_place_chosen_command(callback: CallbackQuery, callback_data: PlaceCallbackFactory, state: FSMContext):
+    await state.update_data(drilldown={
+        "kind": "place",
+        "chat_id": callback_data.chat_id,
+        "title": callback_data.title,
+    })
+    await show_drilldown(callback=callback, state=state, period="month")
+
+
+@router_adm_drilldown.callback_query(StateFilter(FSMStatisticsDrilldown.choose_employee), EmployeeCallbackFactory.filter())
+async def process_adm_stats_employee_chosen_command(callback: CallbackQuery, callback_data: EmployeeCallbackFactory, state: FSMContext):
+    fullname, _ = await AsyncOrm.get_employee_by_id(user_id=callback_data.user_id)
+
+    await state.update_data(drilldown={
+        "kind": "employee",
+        "user_id": callback_data.user_id,
+        "fullname": fullname,
+    })
+    await show_drilldown(callback=callback, state=state, period="month")
+
+
+@router_adm_drilldown.callback_query(
+    StateFilter(FSMStatisticsDrilldown.in_stats),
+    F.data.regexp(r"^adm_(place|employee)_by_(week|month|year)$").as_("match"),
+)
+async def process_adm_drilldown_period_command(callback: CallbackQuery, state: FSMContext, match):
+    await show_drilldown(callback=callback, state=state, period=match.group(2))
+
+
+@router_adm_drilldown.callback_query(
+    StateFilter(FSMStatisticsDrilldown.in_stats),
+    StatsPageCallbackFactory.filter(F.kind.in_({"place", "employee"})),
+)
+async def process_adm_drilldown_page_command(callback: CallbackQuery, callback_data: StatsPageCallbackFactory, state: FSMContext):
+    text, reply_markup = await turn_stats_page(state=state, page=callback_data.page)
+
+    await callback.message.edit_text(
+        text=text,
+        reply_markup=reply_markup,
+        parse_mode="html",
+    )
+    await callback.answer()
+
+
+@router_adm_drilldown.callback_query(StateFilter(FSMStatisticsDrilldown.in_stats), F.data.in_({"adm_place_is_here", "adm_employee_is_here"}))
+async def process_adm_drilldown_is_here_command(callback: CallbackQuery):
+    await callback.answer(text="Вы уже нажали эту кнопку")
+
+
+@router_adm_drilldown.callback_query(
+    StateFilter(FSMStatisticsDrilldown.choose_place, FSMStatisticsDrilldown.choose_employee),
+    F.data == "go_back",
+)
+@router_adm_drilldown.callback_query(
+    StateFilter(FSMStatisticsDrilldown.in_stats),
+    F.data.in_({"adm_stats_place_back", "adm_stats_employee_back"}),
+)
+async def process_adm_drilldown_back_command(callback: CallbackQuery, state: FSMContext):
+    await callback.message.edit_text(
+        text="Выберите статистику:",
+        reply_markup=create_stats_kb(),
+    )
+    await callback.answer()
+    await state.set_state(FSMStatistics.in_stats)
+
+
+@router_adm_drilldown.callback_query(StateFilter(FSMStatisticsDrilldown.in_stats), F.data == "adm_exit")
+async def process_adm_exit_command(callback: CallbackQuery, state: FSMContext):
+    await callback.message.edit_text(
+        text="Вы вернулись в главное меню!",
+    )
+    await callback.answer()
+    await state.clear()
@@ -0,0 +1,54 @@
+from contextlib import aclosing
+from datetime import date
+from tempfile import SpooledTemporaryFile
+
+from aiogram.types import CallbackQuery
+from aiogram import Router, F
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+
+from src.db.queries.dao.dao import AsyncOrm
+from src.fsm.fsm import FSMStatisticsVisitors, FSMStatisticsMoney
+from src.handlers.admin_handler import router_admin
+from src.utils.export import SPOOL_MAX_SIZE, SpooledInputFile, export_csv, export_xlsx
+
+router_adm_export = Router()
+router_admin.include_router(router_adm_export)
+
+EXPORTERS = {
+    "csv": export_csv,
+    "xlsx": export_xlsx,
+}
+
+
+@router_adm_export.callback_query(
+    StateFilter(FSMStatisticsVisitors.in_stats, FSMStatisticsMoney.in_stats),
+    F.data.regexp(r"^adm_(visitors|money)_export_(csv|xlsx)$").as_("match"),
+)
+async def process_adm_export_command(callback: CallbackQuery, state: FSMContext, match):
+    data = await state.get_data()
+
+    if "stats" not in data:
+        await callback.answer(text="Сначала выберите период")
+        return
+
+    await callback.answer(text="Формирую файл...")
+
+    date_from = date.fromisoformat(data["stats"]["date_from"])
+    date_to = date.fromisoformat(data["stats"]["date_to"])
+    file_format = match.group(2)
+
+    # файл закрывается (и удаляется с диска), даже если выгрузка упала посреди потока;
+    # aclosing сразу освобождает серверный курсор и его сессию
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+b") as file:
+        async with aclosing(AsyncOrm.stream_reports_by_date(date_from=date_from, date_to=date_to)) as rows:
+            await EXPORTERS[file_format](rows, file)
+
+        await callback.message.answer_document(
+            document=SpooledInputFile(
+                file=file,
+                filename=f"reports_{date_from.strftime('%d.%m.%Y')}-{date_to.strftime('%d.%m.%Y')}.{file_format}",
+            ),
+            caption=f"Отчёты <b>от</b> {date_from.strftime('%d.%m.%Y')} <b>до</b> {date_to.strftime('%d.%m.%Y')}",
+            parse_mode="html",
+        )
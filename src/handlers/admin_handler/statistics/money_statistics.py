@@ -7,6 +7,10 @@ from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 
 from src.db.queries.dao.dao import AsyncOrm
+from src.db.stats_cache import stats_cache
+from src.utils.formatting import format_money
+from src.callbacks.stats import StatsPageCallbackFactory
+from src.handlers.admin_handler.statistics.stats_pages import open_stats_report, turn_stats_page
 from src.keyboards.adm_keyboard import create_stats_kb, create_stats_money_kb
 from src.fsm.fsm import FSMStatistics, FSMStatisticsMoney
 from src.handlers.admin_handler import router_admin
@@ -15,33 +19,28 @@ router_adm_money = Router()
 router_admin.include_router(router_adm_money)
 
 
-async def get_report_revenue_by_date(
+async def get_revenue_rows(
         date_from: date,
         date_to: date
 ):
-    places = dict()
+    rows = await stats_cache.get(kind="money", date_from=date_from, date_to=date_to)
+    if rows is not None:
+        return rows
+
+    generation = await stats_cache.generation()
     data = await AsyncOrm.get_revenue_data_from_reports_by_date(
         date_from=date_from,
         date_to=date_to,
     )
 
-    for place_title, fullname, _, total_revenue in data:
-        places.setdefault(place_title, []).append((fullname, total_revenue))
-
-    report = f"📊Статистика по посетителям точек\n<b>от</b> {date_from.strftime('%d.%m.%Y')}" \
-             f" <b>до</b> {date_to.strftime('%d.%m.%Y')}\n\n"
-
-    for key in sorted(places.keys()):
-        if places[key]:
-            report += f"Рабочая точка: <b>{key}</b>\n"
-
-            for fullname, revenue in places[key]:
-                report += f"📝Работник: <em>{fullname}</em>\n└"
-                report += f"выручка: <em>{revenue}<b>₽</b></em>\n"
-
-            report += "\n"
+    # [place_title, fullname, total_revenue], сгруппировано по точкам
+    rows = sorted(
+        ([place_title, fullname, format_money(total_revenue)] for place_title, fullname, _, total_revenue in data),
+        key=lambda row: row[0],
+    )
+    await stats_cache.set(kind="money", date_from=date_from, date_to=date_to, value=rows, generation=generation)
 
-    return report
+    return rows
 
 
 @router_adm_money.callback_query(StateFilter(FSMStatisticsMoney.in_stats), F.data == "adm_money_is_here")
@@ -49,6 +48,18 @@ async def process_adm_money_is_here_command(callback: CallbackQuery):
     await callback.answer(text="Вы уже нажали эту кнопку")
 
 
+@router_adm_money.callback_query(StateFilter(FSMStatisticsMoney.in_stats), StatsPageCallbackFactory.filter(F.kind == "money"))
+async def process_adm_money_page_command(callback: CallbackQuery, callback_data: StatsPageCallbackFactory, state: FSMContext):
+    text, reply_markup = await turn_stats_page(state=state, page=callback_data.page)
+
+    await callback.message.edit_text(
+        text=text,
+        reply_markup=reply_markup,
+        parse_mode="html",
+    )
+    await callback.answer()
+
+
 @router_adm_money.callback_query(StateFilter(FSMStatisticsMoney.in_stats), F.data == "adm_exit")
 async def process_adm_exit_command(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
@@ -69,90 +80,72 @@ async def process_adm_stats_money_back_command(callback: CallbackQuery, state: F
 
 
 @router_adm_money.callback_query(StateFilter(FSMStatisticsMoney.in_stats), F.data == "adm_money_by_week")
-async def process_adm_money_by_week_command(callback: CallbackQuery):
+async def process_adm_money_by_week_command(callback: CallbackQuery, state: FSMContext):
     date_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
-    date_last_week = date_now - timedelta(days=7)
+    date_from = date_now - timedelta(days=7)
 
-    builder = InlineKeyboardBuilder()
-    builder.row(
-        InlineKeyboardButton(text="Неделя✅", callback_data="adm_money_is_here"),
-        InlineKeyboardButton(text="Месяц", callback_data="adm_money_by_month"),
-        InlineKeyboardButton(text="Год", callback_data="adm_money_by_year"),
-    )
-    builder.row(
-        InlineKeyboardButton(text="Задать дату вручную", callback_data="adm_money_by_custom"),
-    )
-    builder.row(
-        InlineKeyboardButton(text="➢ Назад", callback_data="adm_stats_money_back"),
-        InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit"),
-    )
-
-    await callback.message.edit_text(
-        text=await get_report_revenue_by_date(
-            date_from=date_last_week,
+    text, reply_markup = await open_stats_report(
+        state=state,
+        kind="money",
+        rows=await get_revenue_rows(
+            date_from=date_from,
             date_to=date_now,
         ),
-        reply_markup=builder.as_markup(),
+        date_from=date_from,
+        date_to=date_now,
+        period="week",
+    )
+    await callback.message.edit_text(
+        text=text,
+        reply_markup=reply_markup,
         parse_mode="html",
     )
     await callback.answer()
 
 
 @router_adm_money.callback_query(StateFilter(FSMStatisticsMoney.in_stats), F.data == "adm_money_by_month")
-async def process_adm_money_by_month_command(callback: CallbackQuery):
+async def process_adm_money_by_month_command(callback: CallbackQuery, state: FSMContext):
     date_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
-    date_last_week = date_now - timedelta(days=30)
+    date_from = date_now - timedelta(days=30)
 
-    builder = InlineKeyboardBuilder()
-    builder.row(
-        InlineKeyboardButton(text="Неделя", callback_data="adm_money_by_week"),
-        InlineKeyboardButton(text="Месяц✅", callback_data="adm_money_is_here"),
-        InlineKeyboardButton(text="Год", callback_data="adm_money_by_year"),
-    )
-    builder.row(
-        InlineKeyboardButton(text="Задать дату вручную", callback_data="adm_money_by_custom"),
-    )
-    builder.row(
-        InlineKeyboardButton(text="➢ Назад", callback_data="adm_stats_money_back"),
-        InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit"),
-    )
-
-    await callback.message.edit_text(
-        text=await get_report_revenue_by_date(
-            date_from=date_last_week,
+    text, reply_markup = await open_stats_report(
+        state=state,
+        kind="money",
+        rows=await get_revenue_rows(
+            date_from=date_from,
             date_to=date_now,
         ),
-        reply_markup=builder.as_markup(),
+        date_from=date_from,
+        date_to=date_now,
+        period="month",
+    )
+    await callback.message.edit_text(
+        text=text,
+        reply_markup=reply_markup,
         parse_mode="html",
     )
     await callback.answer()
 
 
 @router_adm_money.callback_query(StateFilter(FSMStatisticsMoney.in_stats), F.data == "adm_money_by_year")
-async def process_adm_money_by_year_command(callback: CallbackQuery):
+async def process_adm_money_by_year_command(callback: CallbackQuery, state: FSMContext):
     date_now = datetime.now(tz=timezone(timedelta(hours=3.0))).date()
-    date_last_week = date_now - timedelta(days=365)
+    date_from = date_now - timedelta(days=365)
 
-    builder = InlineKeyboardBuilder()
-    builder.row(
-        InlineKeyboardButton(text="Неделя", callback_data="adm_money_by_week"),
-        InlineKeyboardButton(text="Месяц", callback_data="adm_money_by_year"),
-        InlineKeyboardButton(text="Год✅", callback_data="adm_money_is_here"),
-    )
-    builder.row(
-        InlineKeyboardButton(text="Задать дату вручную", callback_data="adm_money_by_custom"),
-    )
-    builder.row(
-        InlineKeyboardButton(text="➢ Назад", callback_data="adm_stats_money_back"),
-        InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit"),
-    )
-
-    await callback.message.edit_text(
-        text=await get_report_revenue_by_date(
-            date_from=date_last_week,
+    text, reply_markup = await open_stats_report(
+        state=state,
+        kind="money",
+        rows=await get_revenue_rows(
+            date_from=date_from,
             date_to=date_now,
         ),
-        reply_markup=builder.as_markup(),
+        date_from=date_from,
+        date_to=date_now,
+        period="year",
+    )
+    await callback.message.edit_text(
+        text=text,
+        reply_markup=reply_markup,
         parse_mode="html",
     )
     await callback.answer()
@@ -209,12 +202,19 @@ async def process_adm_money_custom_date_command(message: Message, state: FSMCont
             date_from: date = datetime.strptime(date_from, "%d.%m.%y").date()
             date_to: date = datetime.strptime(date_to, "%d.%m.%y").date()
 
-            await message.answer(
-                text=await get_report_revenue_by_date(
+            text, reply_markup = await open_stats_report(
+                state=state,
+                kind="money",
+                rows=await get_revenue_rows(
                     date_from=date_from,
                     date_to=date_to,
                 ),
-                reply_markup=create_stats_money_kb(),
+                date_from=date_from,
+                date_to=date_to,
+            )
+            await message.answer(
+                text=text,
+                reply_markup=reply_markup,
                 parse_mode="html",
             )
             await state.set_state(FSMStatisticsMoney.in_stats)
@@ -223,12 +223,19 @@ async def process_adm_money_custom_date_command(message: Message, state: FSMCont
                 date_from: date = datetime.strptime(date_from, "%d.%m.%Y").date()
                 date_to: date = datetime.strptime(date_to, "%d.%m.%Y").date()
 
-                await message.answer(
-                    text=await get_report_revenue_by_date(
+                text, reply_markup = await open_stats_report(
+                    state=state,
+                    kind="money",
+                    rows=await get_revenue_rows(
                         date_from=date_from,
                         date_to=date_to,
                     ),
-                    reply_markup=create_stats_money_kb(),
+                    date_from=date_from,
+                    date_to=date_to,
+                )
+                await message.answer(
+                    text=text,
+                    reply_markup=reply_markup,
                     parse_mode="html",
                 )
                 await state.set_state(FSMStatisticsMoney.in_stats)
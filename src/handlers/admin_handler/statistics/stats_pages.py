@@ -0,0 +1,153 @@
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from aiogram.fsm.context import FSMContext
+from aiogram.types import InlineKeyboardMarkup
+
+from src.keyboards.adm_keyboard import create_stats_period_kb
+from src.utils.templates import ReportTemplate, MESSAGE_LIMIT
+
+# не больше строк "работник - значение" на одной странице; страница заканчивается
+# раньше, если следующая строка не влезет в лимит Telegram (длинные имена и названия)
+PAGE_SIZE = 30
+# имена и названия точек длиннее обрезаются, чтобы одна строка всегда влезала на страницу
+MAX_LABEL_LENGTH = 128
+
+# kind -> (заголовок, строка группы, строка записи).
+# подписи и группы - имена и названия точек, они экранируются; {value:raw} - уже готовый HTML
+STATS_TEXTS = {
+    "visitors": (
+        "📊Статистика по посетителям точек",
+        "Рабочая точка: <b>{group}</b>\n",
+        "📝Работник: <em>{label}</em>\n└посетителей: <em>{value}</em>\n",
+    ),
+    "money": (
+        "📊Статистика по посетителям точек",
+        "Рабочая точка: <b>{group}</b>\n",
+        "📝Работник: <em>{label}</em>\n└выручка: <em>{value}<b>₽</b></em>\n",
+    ),
+    "place": (
+        "📊Статистика точки по дням",
+        "Рабочая точка: <b>{group}</b>\n",
+        "📅{label}\n└{value:raw}\n",
+    ),
+    "employee": (
+        "📊Статистика сотрудника по точкам",
+        "📝Работник: <em>{group}</em>\n",
+        "Рабочая точка: <b>{label}</b>\n└{value:raw}\n",
+    ),
+}
+
+# шаблоны компилируются один раз при импорте
+STATS_TEMPLATES = {
+    kind: tuple(ReportTemplate(text) for text in texts)
+    for kind, texts in STATS_TEXTS.items()
+}
+PERIOD_TEMPLATE = ReportTemplate("<b>от</b> {date_from} <b>до</b> {date_to}\n\n")
+
+# виды статистики с ручным вводом дат и выгрузкой в файл
+EXTENDED_KINDS = ("visitors", "money")
+
+
+async def open_stats_report(
+        state: FSMContext,
+        kind: str,
+        # [группа, подпись, значение], строки одной группы идут подряд
+        rows: List[List[Any]],
+        date_from: date,
+        date_to: date,
+        period: str = None,
+) -> Tuple[str, InlineKeyboardMarkup]:
+    # строки отчёта лежат в данных FSM админа, листание страниц не ходит в БД
+    stats = {
+        "kind": kind,
+        "rows": rows,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "period": period,
+    }
+    # разбиение на страницы считаем один раз, листание берёт готовые границы
+    stats["page_starts"] = paginate_stats(stats)
+    await state.update_data(stats=stats)
+
+    return render_stats_page(stats=stats, page=0)
+
+
+async def turn_stats_page(state: FSMContext, page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    stats = (await state.get_data())["stats"]
+    return render_stats_page(stats=stats, page=page)
+
+
+def paginate_stats(stats: Dict[str, Any]) -> List[int]:
+    # индексы строк, с которых начинается каждая страница
+    _, group_line, item_line = STATS_TEMPLATES[stats["kind"]]
+
+    header_size = len(_render_header(stats))
+    starts = [0]
+    size = header_size
+    count = 0
+    current_group = None
+    for i, (group, label, value) in enumerate(stats["rows"]):
+        item_size = len(item_line.render(label=_cut(label), value=value))
+        group_size = len(group_line.render(group=_cut(group)))
+
+        if count and (count >= PAGE_SIZE or size + 1 + group_size + item_size > MESSAGE_LIMIT):
+            starts.append(i)
+            size, count, current_group = header_size, 0, None
+
+        if group != current_group:
+            size += group_size + (1 if current_group is not None else 0)
+            current_group = group
+        size += item_size
+        count += 1
+
+    return starts
+
+
+def render_stats_page(stats: Dict[str, Any], page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    rows = stats["rows"]
+    starts = stats.get("page_starts") or paginate_stats(stats)
+    pages = len(starts)
+    page = min(max(page, 0), pages - 1)
+    end = starts[page + 1] if page + 1 < pages else len(rows)
+
+    _, group_line, item_line = STATS_TEMPLATES[stats["kind"]]
+
+    chunks = [_render_header(stats)]
+
+    current_group = None
+    for group, label, value in rows[starts[page]:end]:
+        if group != current_group:
+            if current_group is not None:
+                chunks.append("\n")
+            chunks.append(group_line.render(group=_cut(group)))
+            current_group = group
+
+        chunks.append(item_line.render(label=_cut(label), value=value))
+
+    return "".join(chunks), create_stats_period_kb(
+        kind=stats["kind"],
+        period=stats["period"],
+        page=page,
+        pages=pages,
+        extended=stats["kind"] in EXTENDED_KINDS,
+        # страница строится только из загруженного диапазона (в том числе заданного вручную)
+        exportable=True,
+    )
+
+
+def _render_header(stats: Dict[str, Any]) -> str:
+    title = STATS_TEMPLATES[stats["kind"]][0]
+    date_from = date.fromisoformat(stats["date_from"])
+    date_to = date.fromisoformat(stats["date_to"])
+
+    return title.render() + "\n" + PERIOD_TEMPLATE.render(
+        date_from=date_from.strftime('%d.%m.%Y'),
+        date_to=date_to.strftime('%d.%m.%Y'),
+    )
+
+
+def _cut(text: Any) -> Any:
+    if isinstance(text, str) and len(text) > MAX_LABEL_LENGTH:
+        return text[:MAX_LABEL_LENGTH - 1] + "…"
+    return text
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone, timedelta
 
-from typing import Dict, Any, Union
+from typing import Dict, Any
 
 from aiogram import Router, F
 from aiogram.exceptions import TelegramAPIError
@@ -11,38 +11,59 @@ from aiogram.fsm.state import default_state
 
 from src.callbacks.place import PlaceCallbackFactory
 from src.config import settings
-from src.db.queries.dao.dao import AsyncOrm
 from src.lexicon.lexicon_ru import LEXICON_RU
 from src.fsm.fsm import FSMAttractionsCheck
 from src.keyboards.keyboard import create_yes_no_kb, create_places_kb, create_cancel_kb
-from src.db import cached_places
+from src.db import directory_cache
+from src.utils.report_delivery import ReportTrace, prefetch_report, text_deliveries, deliver_report
+from src.utils.templates import ReportTemplate
 import logging
 
 router_attractions = Router()
 logger = logging.getLogger(__name__)
 
 
-async def report(dictionary: Dict[str, Any], date: str, user_id: Union[str, int]) -> str:
-    return "📝Проверка аттракционов:\n\n"\
-           f"Дата: {date}\n" \
-           f"Точка: {dictionary['place']}\n" \
-           f"Имя: {await AsyncOrm.get_current_name(user_id=user_id)}\n\n" \
-           f"Купюроприемники рабочие: <em>{dictionary['bill_acceptors']}</em>\n\n" \
-           f"Номера нерабочих купюроприемников: <em>{dictionary['defects_on_bill_acceptors'] if dictionary['bill_acceptors'] == 'no' else 'None'}</em>\n\n" \
-           f"Дефекты на аттракционах: {dictionary['attracts']}\n\n" \
-           f"Номера аттракционов с дефектами: <em>{dictionary['defects_on_attracts'] if dictionary['attracts'] == 'yes' else 'None'}</em>"
+REPORT_TEMPLATE = ReportTemplate(
+    "📝Проверка аттракционов:\n\n"
+    "Дата: {date}\n"
+    "Точка: {place}\n"
+    "Имя: {fullname}\n\n"
+    "Купюроприемники рабочие: <em>{bill_acceptors}</em>\n\n"
+    "Номера нерабочих купюроприемников: <em>{defects_on_bill_acceptors}</em>\n\n"
+    "Дефекты на аттракционах: {attracts}\n\n"
+    "Номера аттракционов с дефектами: <em>{defects_on_attracts}</em>"
+)
 
 
-async def send_report(message: Message, state: FSMContext, data: dict, date: str, chat_id: Union[str, int]):
+def report(dictionary: Dict[str, Any], date: str, fullname: str) -> str:
+    return REPORT_TEMPLATE.render(
+        date=date,
+        place=dictionary['place'],
+        fullname=fullname,
+        bill_acceptors=dictionary['bill_acceptors'],
+        defects_on_bill_acceptors=dictionary['defects_on_bill_acceptors'] if dictionary['bill_acceptors'] == 'no' else 'None',
+        attracts=dictionary['attracts'],
+        defects_on_attracts=dictionary['defects_on_attracts'] if dictionary['attracts'] == 'yes' else 'None',
+    )
+
+
+async def send_report(message: Message, state: FSMContext, date: str):
+    trace = ReportTrace(kind="check_attractions")
+    ok = False
     try:
-        await message.bot.send_message(
-            chat_id=chat_id,
-            text=await report(
-                dictionary=data,
-                date=date,
-                user_id=message.chat.id,
+        data, fullname = await prefetch_report(state=state, user_id=message.chat.id, trace=trace)
+
+        await deliver_report(
+            bot=message.bot,
+            chat_id=directory_cache.get_places()[data['place']],
+            deliveries=text_deliveries(
+                text=report(
+                    dictionary=data,
+                    date=date,
+                    fullname=fullname,
+                ),
             ),
-            parse_mode="html",
+            trace=trace,
         )
 
         await message.answer(
@@ -53,6 +74,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
         await message.answer(
             text="Вы вернулись в главное меню",
         )
+        ok = True
     except Exception as e:
         logger.exception("Ошибка не с телеграм в check_attractions.py")
         await message.bot.send_message(
@@ -76,6 +98,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
             reply_markup=ReplyKeyboardRemove(),
         )
     finally:
+        trace.finish(ok=ok)
         await state.clear()
 
 
@@ -203,17 +226,13 @@ async def process_attracts_command_no(callback: CallbackQuery, state: FSMContext
         parse_mode="html",
     )
 
-    check_attractions_dict = await state.get_data()
-
     day_of_week = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime('%A')
     date = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime(f'%d/%m/%Y - {LEXICON_RU[day_of_week]}')
 
     await send_report(
         message=callback.message,
         state=state,
-        data=check_attractions_dict,
         date=date,
-        chat_id=cached_places[check_attractions_dict['place']],
     )
     await callback.answer()
 
@@ -229,17 +248,13 @@ async def warning_attracts_command(message: Message):
 async def process_defects_on_attracts_command(message: Message, state: FSMContext):
     await state.update_data(defects_on_attracts=message.text)
 
-    check_attractions_dict = await state.get_data()
-
     day_of_week = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime('%A')
     date = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime(f'%d/%m/%Y - {LEXICON_RU[day_of_week]}')
 
     await send_report(
         message=message,
         state=state,
-        data=check_attractions_dict,
         date=date,
-        chat_id=cached_places[check_attractions_dict['place']],
     )
 
 
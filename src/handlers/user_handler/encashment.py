@@ -2,60 +2,75 @@ from datetime import datetime, timedelta, timezone
 
 from aiogram import Router, F
 from aiogram.exceptions import TelegramAPIError
-from aiogram.types import Message, ReplyKeyboardRemove, InputMediaPhoto, CallbackQuery
+from aiogram.types import Message, ReplyKeyboardRemove, CallbackQuery
 from aiogram.filters import StateFilter, Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import default_state
 
-from typing import Dict, Any, Union
+from typing import Dict, Any, List
 
 from src.callbacks.place import PlaceCallbackFactory
 from src.config import settings
-from src.db.queries.dao.dao import AsyncOrm
 from src.fsm.fsm import FSMEncashment
 from src.lexicon.lexicon_ru import LEXICON_RU
 from src.keyboards.keyboard import create_cancel_kb, create_places_kb
 from src.middlewares.album_middleware import AlbumsMiddleware
-from src.db import cached_places
+from src.db import directory_cache
+from src.utils.report_delivery import ReportTrace, prefetch_report, text_deliveries, deliver_report
+from src.utils.templates import ReportTemplate
 import logging
 
 router_encashment = Router()
-router_encashment.message.middleware(middleware=AlbumsMiddleware(2))
+router_encashment.message.middleware(middleware=AlbumsMiddleware())
 logger = logging.getLogger(__name__)
 
 
-async def report(dictionary: Dict[str, Any], date: str, user_id: Union[str, int]) -> str:
-    return "📝Инкассация:\n\n" \
-           f"Точка: {dictionary['place']}\n" \
-           f"Дата: {date}\n" \
-           f"Имя: {await AsyncOrm.get_current_name(user_id=user_id)}\n\n" \
-           f"Кто инкассировал: <em>{dictionary['who']}</em>\n" \
-           f"Дата инкассации: <em>{dictionary['date']}</em>\n" \
-           f"Сумма инкассации: <em>{dictionary['summary']}</em>"
+REPORT_TEMPLATE = ReportTemplate(
+    "📝Инкассация:\n\n"
+    "Точка: {place}\n"
+    "Дата: {date}\n"
+    "Имя: {fullname}\n\n"
+    "Кто инкассировал: <em>{who}</em>\n"
+    "Дата инкассации: <em>{encashment_date}</em>\n"
+    "Сумма инкассации: <em>{summary}</em>"
+)
 
 
-async def send_report(message: Message, state: FSMContext, data: dict, date: str, chat_id: Union[str, int]):
-    try:
-        await message.bot.send_message(
-            chat_id=chat_id,
-            text=await report(
-                dictionary=data,
-                date=date,
-                user_id=message.chat.id,
-            ),
-            parse_mode="html",
-        )
+def report(dictionary: Dict[str, Any], date: str, fullname: str) -> str:
+    return REPORT_TEMPLATE.render(
+        place=dictionary['place'],
+        date=date,
+        fullname=fullname,
+        who=dictionary['who'],
+        encashment_date=dictionary['date'],
+        summary=dictionary['summary'],
+    )
 
-        photos = [
-            InputMediaPhoto(
-                media=photo_file_id,
-                caption="Фото тетради" if i == 0 else ""
-            ) for i, photo_file_id in enumerate(data['photos'])
-        ]
 
-        await message.bot.send_media_group(
-            media=photos,
-            chat_id=chat_id,
+def report_deliveries(data: dict, text: str) -> List[Dict[str, Any]]:
+    return text_deliveries(text=text) + [
+        {"method": "send_media_group", "payload": {"photos": data['photos'], "caption": "Фото тетради"}},
+    ]
+
+
+async def send_report(message: Message, state: FSMContext, date: str):
+    trace = ReportTrace(kind="encashment")
+    ok = False
+    try:
+        data, fullname = await prefetch_report(state=state, user_id=message.chat.id, trace=trace)
+
+        await deliver_report(
+            bot=message.bot,
+            chat_id=directory_cache.get_places()[data['place']],
+            deliveries=report_deliveries(
+                data=data,
+                text=report(
+                    dictionary=data,
+                    date=date,
+                    fullname=fullname,
+                ),
+            ),
+            trace=trace,
         )
 
         await message.answer(
@@ -66,6 +81,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
         await message.answer(
             text="Вы вернулись в главное меню",
         )
+        ok = True
     except Exception as e:
         logger.exception("Ошибка не с телеграм в encashment.py")
         await message.bot.send_message(
@@ -91,6 +107,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
             reply_markup=ReplyKeyboardRemove(),
         )
     finally:
+        trace.finish(ok=ok)
         await state.clear()
 
 
@@ -188,17 +205,13 @@ async def process_photos_command(message: Message, state: FSMContext):
     if "photos" not in await state.get_data():
         await state.update_data(photos=[message.photo[-1].file_id])
 
-    encashment_dict = await state.get_data()
-
     day_of_week = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime('%A')
     date = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime(f'%d/%m/%Y - {LEXICON_RU[day_of_week]}')
 
     await send_report(
         message=message,
         state=state,
-        data=encashment_dict,
         date=date,
-        chat_id=cached_places[encashment_dict['place']],
     )
 
 
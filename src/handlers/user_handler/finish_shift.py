@@ -1,108 +1,107 @@
 from datetime import datetime, timezone, timedelta
 
-from typing import Dict, Any, Union
+from typing import Dict, Any, List
 
 from aiogram import Router, F
-from aiogram.types import Message, ReplyKeyboardRemove, InputMediaPhoto, CallbackQuery
+from aiogram.types import Message, ReplyKeyboardRemove, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import default_state
 from aiogram.filters import StateFilter, Command
 from aiogram.exceptions import TelegramAPIError
 
+from src.autoposting.outbox import outbox_wakeup
 from src.callbacks.place import PlaceCallbackFactory
-from src.db import cached_places
+from src.db import directory_cache
 from src.db.queries.dao.dao import AsyncOrm
 from src.fsm.fsm import FSMFinishShift
 from src.lexicon.lexicon_ru import LEXICON_RU
 from src.keyboards.keyboard import create_cancel_kb, create_places_kb, create_yes_no_kb
 from src.middlewares.album_middleware import AlbumsMiddleware
 from src.config import settings
+from src.utils.report_delivery import ReportTrace, prefetch_report, text_deliveries
+from src.utils.templates import ReportTemplate
 
 from decimal import Decimal
 import re
 import logging
 
 router_finish = Router()
-router_finish.message.middleware(middleware=AlbumsMiddleware(2))
+router_finish.message.middleware(middleware=AlbumsMiddleware())
 logger = logging.getLogger(__name__)
 
 
-async def report(dictionary: Dict[str, Any], date: str, user_id: Union[str, int]) -> str:
-    return "📝Закрытие смены:\n\n"\
-           f"Дата: {date}\n" \
-           f"Точка: {dictionary['place']}\n" \
-           f"Имя: {await AsyncOrm.get_current_name(user_id=user_id)}\n\n" \
-           f"Льготники: <em>{dictionary['beneficiaries']}</em>\n" \
-           f"Общая выручка: <em>{dictionary['summary']}</em>\n" \
-           f"Наличные: <em>{dictionary['cash']}</em>\n" \
-           f"Безнал: <em>{dictionary['online_cash']}</em>\n" \
-           f"QR-код: <em>{dictionary['qr_code']}</em>\n" \
-           f"Расход: <em>{dictionary['expenditure']}</em>\n" \
-           f"Зарплата: <em>{dictionary['salary']}</em>\n" \
-           f"В конверт: <em>{dictionary['convert']}</em>\n\n" \
-           f"Общее количество прокатов на карусели: <em>{dictionary['count_rentals_carous']}</em>\n\n" \
-           f"Количество проката машинок 5 минут (7): <em>{dictionary['count_cars_5']}</em>\n" \
-           f"Количество проката машинок 10 минут (20): <em>{dictionary['count_cars_10']}</em>\n\n" \
-           f"Количество прокатов тележек: <em>{dictionary['count_rentals_cart']}</em>\n\n" \
-           f"Количество проданного доп.товара: <em>{dictionary['count_additional']}</em>\n"
-
-
-async def send_report(message: Message, state: FSMContext, data: dict, date: str, chat_id: Union[str, int]):
+REPORT_TEMPLATE = ReportTemplate(
+    "📝Закрытие смены:\n\n"
+    "Дата: {date}\n"
+    "Точка: {place}\n"
+    "Имя: {fullname}\n\n"
+    "Льготники: <em>{beneficiaries}</em>\n"
+    "Общая выручка: <em>{summary}</em>\n"
+    "Наличные: <em>{cash}</em>\n"
+    "Безнал: <em>{online_cash}</em>\n"
+    "QR-код: <em>{qr_code}</em>\n"
+    "Расход: <em>{expenditure}</em>\n"
+    "Зарплата: <em>{salary}</em>\n"
+    "В конверт: <em>{convert}</em>\n\n"
+    "Общее количество прокатов на карусели: <em>{count_rentals_carous}</em>\n\n"
+    "Количество проката машинок 5 минут (7): <em>{count_cars_5}</em>\n"
+    "Количество проката машинок 10 минут (20): <em>{count_cars_10}</em>\n\n"
+    "Количество прокатов тележек: <em>{count_rentals_cart}</em>\n\n"
+    "Количество проданного доп.товара: <em>{count_additional}</em>\n"
+)
+REPORT_FIELDS = (
+    "place", "beneficiaries", "summary", "cash", "online_cash", "qr_code", "expenditure", "salary", "convert",
+    "count_rentals_carous", "count_cars_5", "count_cars_10", "count_rentals_cart", "count_additional",
+)
+
+
+def report(dictionary: Dict[str, Any], date: str, fullname: str) -> str:
+    return REPORT_TEMPLATE.render(
+        date=date,
+        fullname=fullname,
+        **{field: dictionary[field] for field in REPORT_FIELDS},
+    )
+
+
+def report_deliveries(data: dict, text: str) -> List[Dict[str, Any]]:
+    # сообщения в чат точки в порядке отправки, их доставит OutboxWorker
+    deliveries = text_deliveries(text=text)
+
+    for key, caption in (
+            ("necessary_photos", "Необходимые фото за смену (чеки о закрытии смены, оплата QR-кода, чек расхода)"),
+            ("object_photo", "Фото объекта"),
+            ("photo_of_beneficiaries", "Необходимые фото льготников"),
+    ):
+        if key in data:
+            deliveries.append({"method": "send_media_group", "payload": {"photos": data[key], "caption": caption}})
+
+    return deliveries
+
+
+async def send_report(message: Message, state: FSMContext, date: str):
+    trace = ReportTrace(kind="finish_shift")
+    ok = False
     try:
-        await message.bot.send_message(
-            chat_id=chat_id,
-            text=await report(
-                dictionary=data,
-                date=date,
-                user_id=message.chat.id,
-            ),
-            parse_mode="html",
-        )
+        data, fullname = await prefetch_report(state=state, user_id=message.chat.id, trace=trace)
 
-        necessary_photos = [
-            InputMediaPhoto(
-                media=photo_file_id,
-                caption="Необходимые фото за смену (чеки о закрытии смены, оплата QR-кода, "
-                        "чек расхода)" if i == 0 else ""
-            ) for i, photo_file_id in enumerate(data["necessary_photos"])
-        ]
-
-        await message.bot.send_media_group(
-            media=necessary_photos,
-            chat_id=chat_id,
-        )
-
-        photos_object = [
-            InputMediaPhoto(
-                media=photo_file_id,
-                caption="Фото объекта" if i == 0 else ""
-            ) for i, photo_file_id in enumerate(data["object_photo"])
-        ]
-
-        await message.bot.send_media_group(
-            media=photos_object,
-            chat_id=chat_id,
-        )
-
-        if "photo_of_beneficiaries" in data:
-            photo_of_beneficiaries = [
-                InputMediaPhoto(
-                    media=photo_file_id,
-                    caption="Необходимые фото льготников" if i == 0 else ""
-                ) for i, photo_file_id in enumerate(data["photo_of_beneficiaries"])
-            ]
-
-            await message.bot.send_media_group(
-                media=photo_of_beneficiaries,
-                chat_id=chat_id,
-            )
-
-        await AsyncOrm.set_data_to_reports(
+        # отчёт и очередь его отправки в чат точки пишутся одной транзакцией,
+        # сотруднику отвечаем сразу, доставкой с повторами занимается OutboxWorker
+        await trace.measure("save", AsyncOrm.set_data_to_reports_with_deliveries(
             user_id=message.chat.id,
             place=data['place'],
             visitors=int(data['visitors']),
-            revenue=int(data['summary'].replace('.', '').replace(',', '')),
-        )
+            revenue=Decimal(data['summary']),
+            chat_id=directory_cache.get_places()[data['place']],
+            deliveries=report_deliveries(
+                data=data,
+                text=report(
+                    dictionary=data,
+                    date=date,
+                    fullname=fullname,
+                ),
+            ),
+        ))
+        outbox_wakeup.set()
 
         await message.answer(
             text="Отлично! Формирую отчёт...\nОтправляю начальству!",
@@ -112,6 +111,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
         await message.answer(
             text="Вы вернулись в главное меню",
         )
+        ok = True
     except Exception as e:
         logger.exception("Ошибка не с телеграм в finish_shift.py")
         await message.bot.send_message(
@@ -137,6 +137,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
             reply_markup=ReplyKeyboardRemove(),
         )
     finally:
+        trace.finish(ok=ok)
         await state.clear()
 
 
@@ -509,17 +510,13 @@ async def process_object_photo_command(message: Message, state: FSMContext):
         if "object_photo" not in await state.get_data():
             await state.update_data(object_photo=[message.photo[-1].file_id])
 
-        finish_shift_dict = await state.get_data()
-
         day_of_week = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime('%A')
         current_date = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime(f'%d/%m/%Y - {LEXICON_RU[day_of_week]}')
 
         await send_report(
             message=message,
             state=state,
-            data=finish_shift_dict,
             date=current_date,
-            chat_id=cached_places[finish_shift_dict['place']],
         )
 
     else:
@@ -1,83 +1,87 @@
-from typing import Dict, Any, Union
+from typing import Dict, Any, List
 from datetime import datetime, timezone, timedelta
 
 from aiogram import Router, F
 from aiogram.exceptions import TelegramAPIError
-from aiogram.types import Message, ReplyKeyboardRemove, InputMediaPhoto, CallbackQuery
+from aiogram.types import Message, ReplyKeyboardRemove, CallbackQuery
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.state import default_state
 from aiogram.fsm.context import FSMContext
 
 from src.callbacks.place import PlaceCallbackFactory
-from src.db.queries.dao.dao import AsyncOrm
 from src.fsm.fsm import FSMStartShift
 from src.keyboards.keyboard import create_cancel_kb, create_places_kb, create_yes_no_kb, create_rules_kb
 from src.middlewares.album_middleware import AlbumsMiddleware
 from src.config import settings
 from src.lexicon.lexicon_ru import LEXICON_RU, rules
-from src.db import cached_places
+from src.db import directory_cache
+from src.utils.report_delivery import ReportTrace, prefetch_report, text_deliveries, deliver_report
+from src.utils.templates import ReportTemplate
 import logging
 
 
 router_start_shift = Router()
-router_start_shift.message.middleware(middleware=AlbumsMiddleware(2))
+router_start_shift.message.middleware(middleware=AlbumsMiddleware())
 logger = logging.getLogger(__name__)
 
 
-async def report(dictionary: Dict[str, Any], date: str, user_id: Union[str, int]) -> str:
-    return f"📝Открытие смены\n\n" \
-           f"Дата: {date}\n" \
-           f"Точка: {dictionary['place']}\n" \
-           f"Имя: {await AsyncOrm.get_current_name(user_id=user_id)}\n\n" \
-           f"Есть ли дефекты: <em>{dictionary['is_defects']}</em>\n" \
-           f"Чистая ли карусель: <em>{dictionary['is_clear']}</em>\n" \
-           f"Включен ли свет: <em>{dictionary['is_light']}</em>\n" \
-           f"Играет ли музыка: <em>{dictionary['is_music']}</em>\n" \
-           f"Есть ли скрип: <em>{dictionary['is_scream']}</em>\n"
+REPORT_TEMPLATE = ReportTemplate(
+    "📝Открытие смены\n\n"
+    "Дата: {date}\n"
+    "Точка: {place}\n"
+    "Имя: {fullname}\n\n"
+    "Есть ли дефекты: <em>{is_defects}</em>\n"
+    "Чистая ли карусель: <em>{is_clear}</em>\n"
+    "Включен ли свет: <em>{is_light}</em>\n"
+    "Играет ли музыка: <em>{is_music}</em>\n"
+    "Есть ли скрип: <em>{is_scream}</em>\n"
+)
 
 
-async def send_report(message: Message, state: FSMContext, data: dict, date: str, chat_id: Union[str, int]):
-    try:
-        await message.bot.send_message(
-            chat_id=chat_id,
-            text=await report(
-                dictionary=data,
-                date=date,
-                user_id=message.chat.id,
-            ),
-            parse_mode="html",
-        )
+def report(dictionary: Dict[str, Any], date: str, fullname: str) -> str:
+    return REPORT_TEMPLATE.render(
+        date=date,
+        place=dictionary['place'],
+        fullname=fullname,
+        is_defects=dictionary['is_defects'],
+        is_clear=dictionary['is_clear'],
+        is_light=dictionary['is_light'],
+        is_music=dictionary['is_music'],
+        is_scream=dictionary['is_scream'],
+    )
 
-        object_photos = [
-            InputMediaPhoto(
-                media=photo_file_id,
-                caption="Фото объекта" if i == 0 else ""
-            ) for i, photo_file_id in enumerate(data['object_photo'])
-        ]
 
-        await message.bot.send_media_group(
-            chat_id=chat_id,
-            media=object_photos,
-        )
+def report_deliveries(data: dict, text: str) -> List[Dict[str, Any]]:
+    deliveries = text_deliveries(text=text) + [
+        {"method": "send_media_group", "payload": {"photos": data['object_photo'], "caption": "Фото объекта"}},
+        {"method": "send_photo", "payload": {"photo": data['my_photo'], "caption": "Фото сотрудника"}},
+    ]
 
-        await message.bot.send_photo(
-            chat_id=chat_id,
-            photo=data['my_photo'],
-            caption='Фото сотрудника',
-        )
+    if "defects_photo" in data:
+        deliveries.append({"method": "send_media_group", "payload": {"photos": data['defects_photo'], "caption": "Фото дефектов"}})
 
-        if "defects_photo" in data:
-            defects_photo = [
-                InputMediaPhoto(
-                    media=photo_file_id,
-                    caption="Фото дефектов" if i == 0 else ""
-                ) for i, photo_file_id in enumerate(data['defects_photo'])
-            ]
+    return deliveries
 
-            await message.bot.send_media_group(
-                chat_id=chat_id,
-                media=defects_photo,
-            )
+
+async def send_report(message: Message, state: FSMContext, date: str):
+    trace = ReportTrace(kind="start_shift")
+    ok = False
+    try:
+        data, fullname = await prefetch_report(state=state, user_id=message.chat.id, trace=trace)
+
+        await deliver_report(
+            bot=message.bot,
+            chat_id=directory_cache.get_places()[data['place']],
+            deliveries=report_deliveries(
+                data=data,
+                text=report(
+                    dictionary=data,
+                    date=date,
+                    fullname=fullname,
+                ),
+            ),
+            trace=trace,
+        )
 
         await message.answer(
             text="Данные успешно записаны!\n"
@@ -88,6 +92,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
         await message.answer(
             text="Вы вернулись в главное меню",
         )
+        ok = True
 
     except Exception as e:
         logger.exception("Ошибка не с телеграм в start_shift.py")
@@ -118,6 +123,7 @@ async def send_report(message: Message, state: FSMContext, data: dict, date: str
             reply_markup=ReplyKeyboardRemove(),
         )
     finally:
+        trace.finish(ok=ok)
         await state.clear()
 
 
@@ -417,17 +423,13 @@ async def process_scream_yes_command(callback: CallbackQuery, state: FSMContext)
         parse_mode="html",
     )
 
-    start_shift_dict = await state.get_data()
-
     day_of_week = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime('%A')
     current_date = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime(f'%d/%m/%Y - {LEXICON_RU[day_of_week]}')
 
     await send_report(
         message=callback.message,
         state=state,
-        data=start_shift_dict,
         date=current_date,
-        chat_id=cached_places[start_shift_dict['place']],
     )
     await callback.answer()
 
@@ -442,17 +444,13 @@ async def process_scream_no_command(callback: CallbackQuery, state: FSMContext):
         parse_mode="html",
     )
 
-    start_shift_dict = await state.get_data()
-
     day_of_week = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime('%A')
     current_date = datetime.now(tz=timezone(timedelta(hours=3.0))).strftime(f'%d/%m/%Y - {LEXICON_RU[day_of_week]}')
 
     await send_report(
         message=callback.message,
         state=state,
-        data=start_shift_dict,
         date=current_date,
-        chat_id=cached_places[start_shift_dict['place']],
     )
     await callback.answer()
 
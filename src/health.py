@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from aiogram import Dispatcher
+from aiohttp import web
+from sqlalchemy import text
+
+from src.config import settings, redis
+from src.database import async_engine, get_pool_stats
+from src.db import role_index, name_cache
+from src.db.queries.dao.dao import AsyncOrm
+from src.utils.report_delivery import report_timings
+
+logger = logging.getLogger(__name__)
+
+# проверка не должна висеть дольше, чем ждёт балансировщик/оркестратор
+CHECK_TIMEOUT_SECONDS = 3.0
+
+
+async def _ping_database() -> float:
+    started = time.perf_counter()
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+async def _ping_redis() -> float:
+    started = time.perf_counter()
+    await redis.ping()
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+async def _check(name: str, ping) -> Dict[str, Any]:
+    try:
+        latency_ms = await asyncio.wait_for(ping(), timeout=CHECK_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"Проверка {name} не прошла: {e!r}")
+        return {"ok": False, "error": repr(e)}
+
+    return {"ok": True, "latency_ms": latency_ms}
+
+
+async def collect_health(dp: Dispatcher) -> Dict[str, Any]:
+    database, redis_check = await asyncio.gather(
+        _check("database", _ping_database),
+        _check("redis", _ping_redis),
+    )
+
+    report = {
+        "ok": database["ok"] and redis_check["ok"],
+        "database": database,
+        "redis": redis_check,
+        "db_pool": get_pool_stats(),
+        "role_index": role_index.get_stats(),
+        "name_cache": name_cache.get_stats(),
+        "reports": report_timings.get_stats(),
+    }
+
+    update_scheduler = dp.get("update_scheduler")
+    if update_scheduler is not None:
+        report["updates"] = update_scheduler.get_stats()
+
+    try:
+        pending, oldest = await asyncio.wait_for(AsyncOrm.get_outbox_backlog(), timeout=CHECK_TIMEOUT_SECONDS)
+        report["outbox"] = {
+            "pending": pending,
+            "oldest_pending": oldest.isoformat() if oldest is not None else None,
+        }
+    except Exception as e:
+        report["outbox"] = {"error": repr(e)}
+
+    send_limiter = dp.get("send_limiter")
+    if send_limiter is not None:
+        report["outbound"] = send_limiter.get_stats()
+
+    return report
+
+
+def setup_health(app: web.Application, dp: Dispatcher) -> None:
+    async def health_handler(request: web.Request) -> web.Response:
+        report = await collect_health(dp)
+        return web.json_response(report, status=200 if report["ok"] else 503)
+
+    app.router.add_get(settings.HEALTH_PATH, health_handler)
+
+
+async def run_health_server(dp: Dispatcher) -> None:
+    # в режиме polling HTTP-сервера нет, поднимаем отдельный только под проверку
+    app = web.Application()
+    setup_health(app, dp)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEBAPP_HOST, port=settings.HEALTH_PORT)
+    await site.start()
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
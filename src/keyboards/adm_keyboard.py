@@ -1,8 +1,12 @@
+from typing import Optional
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from src.callbacks.employee import EmployeeCallbackFactory
 from src.callbacks.admin import AdminCallbackFactory
 from src.callbacks.place import PlaceCallbackFactory
-from src.db import cached_places, cached_employees_fullname_and_id, cached_admins_fullname_and_id
+from src.callbacks.stats import StatsPageCallbackFactory
+from src.db import directory_cache
 
 
 def create_admin_kb() -> InlineKeyboardMarkup:
@@ -58,7 +62,7 @@ def check_add_place() -> InlineKeyboardMarkup:
 def create_employee_list_kb() -> InlineKeyboardMarkup:
     kb = []
 
-    for fullname, user_id in cached_employees_fullname_and_id:
+    for fullname, user_id in directory_cache.get_employees_fullname_and_id():
         kb.append([
             InlineKeyboardButton(
                 text=f"{fullname}",
@@ -76,7 +80,7 @@ def create_employee_list_kb() -> InlineKeyboardMarkup:
 def create_admin_list_kb() -> InlineKeyboardMarkup:
     kb = []
 
-    for fullname, user_id in cached_admins_fullname_and_id:
+    for fullname, user_id in directory_cache.get_admins_fullname_and_id():
         kb.append([
             InlineKeyboardButton(
                 text=f"{fullname}",
@@ -94,7 +98,7 @@ def create_admin_list_kb() -> InlineKeyboardMarkup:
 def create_places_list_kb() -> InlineKeyboardMarkup:
     kb = []
 
-    for title, chat_id in cached_places.items():
+    for title, chat_id in directory_cache.get_places().items():
         kb.append([
             InlineKeyboardButton(
                 text=f"{title}",
@@ -148,6 +152,10 @@ def create_stats_kb() -> InlineKeyboardMarkup:
         inline_keyboard=[
             [InlineKeyboardButton(text="Посетители", callback_data="adm_stats_visitors")],
             [InlineKeyboardButton(text="Выручка", callback_data="adm_stats_money")],
+            [
+                InlineKeyboardButton(text="По точке", callback_data="adm_stats_place"),
+                InlineKeyboardButton(text="По сотруднику", callback_data="adm_stats_employee"),
+            ],
             [
                 InlineKeyboardButton(text="➢ Назад", callback_data="adm_stats_back"),
                 InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit")
@@ -157,34 +165,56 @@ def create_stats_kb() -> InlineKeyboardMarkup:
 
 
 def create_stats_visitors_kb() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="Неделя", callback_data="adm_visitors_by_week"),
-                InlineKeyboardButton(text="Месяц", callback_data="adm_visitors_by_month"),
-                InlineKeyboardButton(text="Год", callback_data="adm_visitors_by_year")
-            ],
-            [InlineKeyboardButton(text="Задать дату вручную", callback_data="adm_visitors_by_custom")],
-            [
-                InlineKeyboardButton(text="➢ Назад", callback_data="adm_stats_visitors_back"),
-                InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit")
-            ],
-        ]
-    )
+    return create_stats_period_kb(kind="visitors")
 
 
 def create_stats_money_kb() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="Неделя", callback_data="adm_money_by_week"),
-                InlineKeyboardButton(text="Месяц", callback_data="adm_money_by_month"),
-                InlineKeyboardButton(text="Год", callback_data="adm_money_by_year")
-            ],
-            [InlineKeyboardButton(text="Задать дату вручную", callback_data="adm_money_by_custom")],
-            [
-                InlineKeyboardButton(text="➢ Назад", callback_data="adm_stats_money_back"),
-                InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit")
-            ],
-        ]
-    )
\ No newline at end of file
+    return create_stats_period_kb(kind="money")
+
+
+def create_stats_period_kb(
+        kind: str,
+        period: Optional[str] = None,
+        page: int = 0,
+        pages: int = 1,
+        extended: bool = True,
+        exportable: bool = False,
+) -> InlineKeyboardMarkup:
+    # kind - вид статистики (visitors/money/place/employee), period - выбранная кнопка (week/month/year) или None,
+    # extended - показывать ли ручной ввод дат и выгрузку,
+    # exportable - диапазон уже загружен в FSM и его есть что выгружать
+    builder = InlineKeyboardBuilder()
+
+    builder.row(*[
+        InlineKeyboardButton(text=f"{text}✅", callback_data=f"adm_{kind}_is_here")
+        if key == period else
+        InlineKeyboardButton(text=text, callback_data=f"adm_{kind}_by_{key}")
+        for key, text in (("week", "Неделя"), ("month", "Месяц"), ("year", "Год"))
+    ])
+
+    if pages > 1:
+        builder.row(
+            InlineKeyboardButton(
+                text="◀️",
+                callback_data=StatsPageCallbackFactory(kind=kind, page=(page - 1) % pages).pack(),
+            ),
+            InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data=f"adm_{kind}_is_here"),
+            InlineKeyboardButton(
+                text="▶️",
+                callback_data=StatsPageCallbackFactory(kind=kind, page=(page + 1) % pages).pack(),
+            ),
+        )
+
+    if extended:
+        builder.row(InlineKeyboardButton(text="Задать дату вручную", callback_data=f"adm_{kind}_by_custom"))
+    if extended and exportable:
+        builder.row(
+            InlineKeyboardButton(text="Выгрузить CSV", callback_data=f"adm_{kind}_export_csv"),
+            InlineKeyboardButton(text="Выгрузить XLSX", callback_data=f"adm_{kind}_export_xlsx"),
+        )
+    builder.row(
+        InlineKeyboardButton(text="➢ Назад", callback_data=f"adm_stats_{kind}_back"),
+        InlineKeyboardButton(text="➢ Выход", callback_data="adm_exit"),
+    )
+
+    return builder.as_markup()
@@ -1,7 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardButton, InlineKeyboardMarkup
 from src.callbacks.place import PlaceCallbackFactory
-from src.db import cached_places
+from src.db import directory_cache
 
 
 def create_yes_no_kb() -> InlineKeyboardMarkup:
@@ -26,7 +26,7 @@ def create_cancel_kb() -> ReplyKeyboardMarkup:
 def create_places_kb() -> InlineKeyboardMarkup:
     kb = []
 
-    for title, chat_id in cached_places.items():
+    for title, chat_id in directory_cache.get_places().items():
         kb.append([
             InlineKeyboardButton(text=title, callback_data=PlaceCallbackFactory(
                 title=title,
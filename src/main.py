@@ -1,15 +1,22 @@
 import asyncio
 import logging
 import sys
-from threading import Thread
 
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.redis import RedisStorage
 
-from autoposting.check_for_revenue import creating_new_loop_for_checking_revenue
+from src.autoposting.check_for_revenue import RevenueReportScheduler
+from src.autoposting.outbox import OutboxWorker
 
 from src.config import settings, redis
+from src.db import directory_cache, directory_bus, name_cache
 from menu_commands import set_default_commands
+from src.webhook import run_webhook
+from src.health import run_health_server
+from src.middlewares.update_scheduler_middleware import UpdateSchedulerMiddleware
+from src.middlewares.album_collector import RedisAlbumCollector
+from src.middlewares.db_session_middleware import DbSessionMiddleware, DbReleaseRequestMiddleware
+from src.middlewares.send_rate_limiter import SendRateLimiterMiddleware
 from src.handlers import (
     router_authorise,
     router_attractions,
@@ -34,6 +41,33 @@ async def main() -> None:
         filemode="w",
     )
 
+    # Апдейты разных чатов обрабатываются параллельно (не больше MAX_CONCURRENT_UPDATES),
+    # апдейты одного чата - строго по очереди, чтобы шаги FSM не гонялись
+    # альбомы собираются здесь же: части альбома не стоят в очереди чата,
+    # а собранный альбом обрабатывается по очереди с остальными сообщениями чата
+    update_scheduler = UpdateSchedulerMiddleware(
+        settings.MAX_CONCURRENT_UPDATES,
+        album_collector=RedisAlbumCollector(redis=redis, wait_time_seconds=2, ttl_seconds=22),
+    )
+    dp.update.outer_middleware(update_scheduler)
+    dp["update_scheduler"] = update_scheduler
+    # одна сессия БД на апдейт, коммит после хендлера
+    dp.update.middleware(DbSessionMiddleware())
+    # ...или раньше, перед первым запросом к Telegram. регистрируется первым,
+    # чтобы коммит шёл до ожидания в лимитере
+    bot.session.middleware(DbReleaseRequestMiddleware())
+
+    # все исходящие запросы бота (хендлеры и автоотчёты) проходят через лимиты Telegram:
+    # общий, на чат, с ожиданием retry_after после 429 и повторами при сетевых ошибках
+    send_limiter = SendRateLimiterMiddleware(
+        global_per_second=settings.SEND_GLOBAL_PER_SECOND,
+        group_per_minute=settings.SEND_GROUP_PER_MINUTE,
+        private_per_second=settings.SEND_PRIVATE_PER_SECOND,
+        max_retries=settings.SEND_MAX_RETRIES,
+    )
+    bot.session.middleware(send_limiter)
+    dp["send_limiter"] = send_limiter
+
     # Подключаем роутеры к диспетчеру
     dp.include_router(router_authorise)
     dp.include_router(router_start_shift)
@@ -42,15 +76,35 @@ async def main() -> None:
     dp.include_router(router_finish)
     dp.include_router(router_admin)
 
-    await set_default_commands(bot)
-    await bot.delete_webhook(drop_pending_updates=True)
+    # справочник сотрудников/админов/точек загружаем до приёма апдейтов,
+    # дальше он сам периодически перечитывается из БД
+    await directory_cache.reload()
+    await name_cache.warm(directory_cache.get_fullnames())
+    background_tasks = [
+        asyncio.create_task(directory_cache.run_periodic_reload(settings.DIRECTORY_RELOAD_SECONDS)),
+        # изменения справочника из других процессов бота
+        asyncio.create_task(directory_bus.listen()),
+        # автоотчёты по выручке точек
+        asyncio.create_task(RevenueReportScheduler(bot).run()),
+        # доставка отчётов о закрытии смены в чаты точек
+        asyncio.create_task(OutboxWorker(bot).run()),
+    ]
+    if not settings.USE_WEBHOOK and settings.HEALTH_PORT:
+        # при webhook проверка здоровья висит на том же сервере
+        background_tasks.append(asyncio.create_task(run_health_server(dp)))
 
-    global_loop = asyncio.get_event_loop()
-    auto_checking_revenue_thread = Thread(target=creating_new_loop_for_checking_revenue, args=(global_loop, bot))
-    auto_checking_revenue_thread.start()
+    await set_default_commands(bot)
 
     print("Бот успешно запущен!", file=sys.stderr)
-    await dp.start_polling(bot)
+    try:
+        if settings.USE_WEBHOOK:
+            await run_webhook(dp=dp, bot=bot)
+        else:
+            await bot.delete_webhook(drop_pending_updates=settings.DROP_PENDING_UPDATES)
+            await dp.start_polling(bot)
+    finally:
+        for task in background_tasks:
+            task.cancel()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.types import Message
+from redis.asyncio import Redis
+
+
+class RedisAlbumCollector:
+    def __init__(self, redis: Redis, wait_time_seconds: float, ttl_seconds: int):
+        self.redis = redis
+        self.wait_time_seconds = wait_time_seconds
+        self.ttl_seconds = ttl_seconds
+
+    async def add(self, message: Message) -> bool:
+        # True - этот процесс стал владельцем альбома и должен его отправить в хендлер
+        album_id = message.media_group_id
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.exists(self._key(album_id, "flushed"))
+            pipe.rpush(self._key(album_id, "messages"), message.model_dump_json(exclude_none=True))
+            pipe.expire(self._key(album_id, "messages"), self.ttl_seconds)
+            pipe.set(self._key(album_id, "last"), time.time(), ex=self.ttl_seconds)
+            pipe.set(self._key(album_id, "owner"), 1, nx=True, ex=self.ttl_seconds)
+            flushed, _, _, _, is_owner = await pipe.execute()
+
+        # опоздавшее сообщение уже отправленного альбома
+        if flushed:
+            return False
+
+        return bool(is_owner)
+
+    async def collect(self, album_id: str, bot: Bot) -> List[Message]:
+        # ждём, пока wait_time_seconds подряд в альбом не придёт ничего нового,
+        # сообщения могут приходить в любой процесс бота
+        while True:
+            last = await self.redis.get(self._key(album_id, "last"))
+            delay = self._delay(last)
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(self._key(album_id, "messages"), 0, -1)
+            pipe.delete(self._key(album_id, "messages"), self._key(album_id, "last"))
+            pipe.set(self._key(album_id, "flushed"), 1, ex=self.ttl_seconds)
+            raw_messages, _, _ = await pipe.execute()
+
+        messages = [Message.model_validate_json(raw).as_(bot) for raw in raw_messages]
+        messages.sort(key=lambda item: item.message_id)
+
+        return messages
+
+    def _delay(self, last: Optional[bytes]) -> float:
+        if last is None:
+            return 0.0
+        return float(last) + self.wait_time_seconds - time.time()
+
+    @staticmethod
+    def _key(album_id: str, suffix: str) -> str:
+        return f"album:{album_id}:{suffix}"
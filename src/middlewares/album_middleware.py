@@ -1,21 +1,38 @@
-import asyncio
-from typing import Callable, Any, Awaitable, Dict
+from typing import Callable, Any, Awaitable, Dict, NamedTuple, Tuple
 
-from aiogram import BaseMiddleware, F
-from aiogram.types import Message, TelegramObject
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message, TelegramObject, ContentType
 
-from cachetools import TTLCache
+from src.fsm.fsm import FSMStartShift, FSMFinishShift, FSMEncashment
+
+
+class AlbumField(NamedTuple):
+    # ключ в данных FSM, куда складываются file_id альбома
+    field: str
+    media_types: Tuple[str, ...] = (ContentType.PHOTO,)
+    warning: str = "Нужны только фото!"
+
+
+# состояние FSM -> какое поле собирает альбом, присланный в этом состоянии
+ALBUM_FIELDS: Dict[str, AlbumField] = {
+    FSMStartShift.object_photo.state: AlbumField(field="object_photo"),
+    FSMStartShift.defects_photo.state: AlbumField(field="defects_photo"),
+    FSMFinishShift.photo_of_beneficiaries.state: AlbumField(field="photo_of_beneficiaries"),
+    FSMFinishShift.necessary_photos.state: AlbumField(field="necessary_photos"),
+    FSMFinishShift.object_photo.state: AlbumField(field="object_photo"),
+    FSMEncashment.photos.state: AlbumField(field="photos"),
+}
+
+# состояния, в которых ждём ровно одно фото, а не альбом
+SINGLE_PHOTO_STATES = {
+    FSMStartShift.my_photo.state,
+}
 
 
 class AlbumsMiddleware(BaseMiddleware):
-    def __init__(self, wait_time_seconds: int):
-        super().__init__()
-        self.wait_time_seconds = wait_time_seconds
-        self.albums_cache = TTLCache(
-            ttl=float(wait_time_seconds) + 20.0,
-            maxsize=1000
-        )
-        self.lock = asyncio.Lock()
+    # сам альбом собирает UpdateSchedulerMiddleware до очереди чата (в Redis, поэтому части
+    # могут прийти в разные процессы бота), здесь он только раскладывается по полям FSM
 
     async def __call__(
             self,
@@ -32,77 +49,36 @@ class AlbumsMiddleware(BaseMiddleware):
         if event.media_group_id is None:
             return await handler(event, data)
 
-        album_id: str = event.media_group_id
-
-        async with self.lock:
-            self.albums_cache.setdefault(album_id, list())
-            self.albums_cache[album_id].append(event)
+        album = data.get("album")
+        if album is None:
+            raise RuntimeError(
+                f"{self.__class__.__name__} ждёт альбом от UpdateSchedulerMiddleware, "
+                "он должен быть зарегистрирован как outer middleware апдейтов"
+            )
 
-        await asyncio.sleep(self.wait_time_seconds)
-
-        my_message_id = smallest_message_id = event.message_id
-
-        item: Message
-        for item in self.albums_cache[album_id]:
-            smallest_message_id = min(smallest_message_id, item.message_id)
-
-        if my_message_id != smallest_message_id:
-            return
+        state: FSMContext = data["state"]
+        current_state = await state.get_state()
 
         # Если сотрудник прислал более одного фото, то скипаем апдейт
-        if str(await data["state"].get_state()).split(":")[-1] == "my_photo":
+        if current_state in SINGLE_PHOTO_STATES:
             await event.answer(text="Нужно прислать одно фото!")
             return
 
-        context: F = data["state"]
-        context.album = self.albums_cache[album_id]
+        album_field = ALBUM_FIELDS.get(current_state)
 
-        if str(await data["state"].get_state()).split(":")[-1] == "object_photo":
-            for info in context.album:
-                if info.video:
-                    await event.answer(text="Нужны только фото!")
+        if album_field is not None:
+            for item in album:
+                if item.content_type not in album_field.media_types:
+                    await event.answer(text=album_field.warning)
                     return
 
-            await data["state"].update_data(object_photo=[photo.photo[-1].file_id for photo in context.album])
-
-        if str(await data["state"].get_state()).split(":")[-1] == "defects_photo":
-            for info in context.album:
-                if info.video:
-                    await event.answer(text="Нужны только фото!")
-                    return
+            await state.update_data({
+                album_field.field: [_get_file_id(item) for item in album],
+            })
 
-            await data["state"].update_data(defects_photo=[photo.photo[-1].file_id for photo in context.album])
-
-        if str(await data["state"].get_state()).split(":")[-1] == "photo_of_beneficiaries":
-            for info in context.album:
-                if info.video:
-                    await event.answer(text="Нужны только фото!")
-                    return
-
-            await data["state"].update_data(photo_of_beneficiaries=[photo.photo[-1].file_id for photo in context.album])
-
-        if str(await data["state"].get_state()).split(":")[-1] == "object_photo":
-            for info in context.album:
-                if info.video:
-                    await event.answer(text="Нужны только фото!")
-                    return
-
-            await data["state"].update_data(object_photo=[photo.photo[-1].file_id for photo in context.album])
-
-        if str(await data["state"].get_state()).split(":")[-1] == "necessary_photos":
-            for info in context.album:
-                if info.video:
-                    await event.answer(text="Нужны только фото!")
-                    return
-
-            await data["state"].update_data(necessary_photos=[photo.photo[-1].file_id for photo in context.album])
-
-        if str(await data["state"].get_state()).split(":")[-1] == "photos":
-            for info in context.album:
-                if info.video:
-                    await event.answer(text="Нужны только фото!")
-                    return
+        return await handler(event, data)
 
-            await data["state"].update_data(photos=[photo.photo[-1].file_id for photo in context.album])
 
-        return await handler(event, data)
\ No newline at end of file
+def _get_file_id(message: Message) -> str:
+    # AlbumField.media_types пропускает только фото
+    return message.photo[-1].file_id
@@ -0,0 +1,37 @@
+from typing import Callable, Any, Awaitable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+
+from src.database import unit_of_work, release_unit_of_work
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        # все вызовы AsyncOrm за апдейт идут через одну сессию.
+        # соединение берётся из пула только при первом запросе к БД,
+        # коммит - перед первым запросом к Telegram (DbReleaseRequestMiddleware) и в конце
+        async with unit_of_work() as session:
+            data["session"] = session
+            return await handler(event, data)
+
+
+class DbReleaseRequestMiddleware(BaseRequestMiddleware):
+    # перед любым запросом бота коммитим транзакцию апдейта: соединение не висит
+    # idle in transaction, пока запрос ждёт лимитов и повторов в SendRateLimiterMiddleware
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType[TelegramType],
+            bot: Bot,
+            method: TelegramMethod[TelegramType],
+    ) -> Any:
+        await release_unit_of_work()
+        return await make_request(bot, method)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+from aiogram.methods import TelegramMethod, SendMediaGroup
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    async def take(self, cost: float = 1.0) -> float:
+        # ждём, пока накопится cost токенов, возвращает сколько ждали
+        cost = min(cost, self.capacity)
+        waited = 0.0
+
+        while True:
+            self._refill()
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return waited
+
+            delay = (cost - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        # после 429: до конца retry_after токенов не будет
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class SendRateLimiterMiddleware(BaseRequestMiddleware):
+    # чистим вёдра давно молчащих чатов, когда их становится больше
+    MAX_IDLE_CHATS = 1000
+
+    def __init__(
+            self,
+            global_per_second: float,
+            group_per_minute: float,
+            private_per_second: float,
+            max_retries: int,
+    ):
+        self.global_bucket = TokenBucket(rate=global_per_second, capacity=global_per_second)
+        self.group_per_minute = group_per_minute
+        self.private_per_second = private_per_second
+        self.max_retries = max_retries
+        # chat_id -> [lock, bucket, сколько запросов сейчас держат/ждут lock];
+        # lock держится на всю отправку с ретраями, поэтому сообщения в один чат
+        # уходят строго в порядке вызова
+        self.chats: Dict[Union[int, str], list] = {}
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.sent = 0
+        self.retried = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.throttled_seconds = 0.0
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType[TelegramType],
+            bot: Bot,
+            method: TelegramMethod[TelegramType],
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # answerCallbackQuery, getMe, setWebhook и т.п. лимитами на чат не ограничены
+            return await make_request(bot, method)
+
+        # альбом Telegram считает как несколько сообщений
+        cost = len(method.media) if isinstance(method, SendMediaGroup) else 1
+        # счётчик увеличиваем без await после _get_chat: пока он не ноль,
+        # запись чата не удалит _drop_idle_chats, и следующий запрос получит тот же lock
+        entry = self._get_chat(chat_id)
+        entry[2] += 1
+        lock, bucket, _ = entry
+
+        self.waiting += 1
+        started = False
+        try:
+            async with lock:
+                self.waiting -= 1
+                self.in_flight += 1
+                started = True
+                return await self._send(make_request, bot, method, bucket, cost)
+        finally:
+            entry[2] -= 1
+            if started:
+                self.in_flight -= 1
+            else:
+                self.waiting -= 1
+
+    async def _send(self, make_request, bot: Bot, method: TelegramMethod, bucket: TokenBucket, cost: int) -> Any:
+        attempt = 0
+        while True:
+            # сначала лимит чата, потом общий: ждущие своего чата не тратят общие токены
+            self.throttled_seconds += await bucket.take(cost)
+            self.throttled_seconds += await self.global_bucket.take(cost)
+
+            try:
+                result = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.rate_limited += 1
+                if attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                logger.warning(f"429 от Telegram для чата {method.chat_id}, ждём {e.retry_after} с")
+                bucket.pause(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                if attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                delay = min(2 ** attempt, 30)
+                logger.warning(f"Ошибка отправки в чат {method.chat_id}: {e!r}, повтор через {delay} с")
+                await asyncio.sleep(delay)
+            else:
+                self.sent += 1
+                return result
+
+            attempt += 1
+            self.retried += 1
+
+    def _get_chat(self, chat_id: Union[int, str]) -> list:
+        entry = self.chats.get(chat_id)
+        if entry is None:
+            if len(self.chats) >= self.MAX_IDLE_CHATS:
+                self._drop_idle_chats()
+
+            if self._is_group(chat_id):
+                bucket = TokenBucket(rate=self.group_per_minute / 60, capacity=self.group_per_minute)
+            else:
+                # в личке допускаем короткий всплеск из нескольких сообщений подряд
+                bucket = TokenBucket(rate=self.private_per_second, capacity=max(self.private_per_second, 3))
+            entry = self.chats[chat_id] = [asyncio.Lock(), bucket, 0]
+
+        return entry
+
+    def _drop_idle_chats(self) -> None:
+        for chat_id, (lock, bucket, users) in list(self.chats.items()):
+            if not users and bucket.is_full():
+                del self.chats[chat_id]
+
+    @staticmethod
+    def _is_group(chat_id: Union[int, str]) -> bool:
+        # у групп, супергрупп и каналов chat_id отрицательный, @username - тоже канал/группа
+        try:
+            return int(chat_id) < 0
+        except ValueError:
+            return True
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+            "throttled_seconds": round(self.throttled_seconds, 2),
+            "active_chats": len(self.chats),
+        }
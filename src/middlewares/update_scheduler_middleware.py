@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import Callable, Any, Awaitable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.middlewares.album_collector import RedisAlbumCollector
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    def __init__(self, max_concurrent_updates: int, album_collector: RedisAlbumCollector):
+        super().__init__()
+        self.semaphore = asyncio.Semaphore(max_concurrent_updates)
+        self.album_collector = album_collector
+        # chat_id -> [lock, сколько апдейтов этого чата сейчас держат/ждут lock]
+        self.chat_locks: Dict[int, list] = {}
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.processed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        album_id = self._get_album_id(event)
+        # части альбома, кроме первой, сразу отдаём сборщику и в очередь чата не ставим:
+        # альбом уйдёт в хендлер одним апдейтом владельца
+        if album_id is not None and not await self.album_collector.add(event.message):
+            return None
+
+        chat_id = self._get_chat_key(event, data)
+        enqueued_at = time.monotonic()
+        started = False
+        self.waiting += 1
+
+        entry = None
+        if chat_id is not None:
+            entry = self.chat_locks.setdefault(chat_id, [asyncio.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            # сначала очередь внутри чата, потом общий лимит:
+            # иначе ждущие своей очереди апдейты одного чата занимали бы слоты семафора
+            if entry is not None:
+                await entry[0].acquire()
+            try:
+                if album_id is not None:
+                    # ждём остальные части под lock чата, но до семафора: следующее сообщение
+                    # чата не обгонит альбом, а ожидание не занимает общий слот
+                    data["album"] = await self.album_collector.collect(album_id=album_id, bot=data["bot"])
+
+                async with self.semaphore:
+                    started = True
+                    self._on_start(enqueued_at)
+                    return await handler(event, data)
+            finally:
+                if entry is not None:
+                    entry[0].release()
+        finally:
+            self._on_finish(started)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self.chat_locks.pop(chat_id, None)
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "active_chats": len(self.chat_locks),
+            "avg_wait_ms": round(self.total_wait / self.processed * 1000, 2) if self.processed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+    def _on_start(self, enqueued_at: float) -> None:
+        wait = time.monotonic() - enqueued_at
+        self.waiting -= 1
+        self.in_flight += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def _on_finish(self, started: bool) -> None:
+        if started:
+            self.in_flight -= 1
+            self.processed += 1
+        else:
+            # апдейт отменили, пока он стоял в очереди
+            self.waiting -= 1
+
+    @staticmethod
+    def _get_album_id(event: TelegramObject) -> Optional[str]:
+        if isinstance(event, Update) and event.message and event.message.media_group_id:
+            return event.message.media_group_id
+        return None
+
+    @staticmethod
+    def _get_chat_key(event: TelegramObject, data: Dict[str, Any]) -> Optional[int]:
+        chat = data.get("event_chat")
+        if chat is not None:
+            return chat.id
+
+        user = data.get("event_from_user")
+        if user is not None:
+            return user.id
+
+        return None
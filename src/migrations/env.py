@@ -7,7 +7,7 @@ from alembic import context
 
 from src.config import settings
 from src.database import Base
-from src.db.queries.models.models import Employees, Places, Reports, Finances
+from src.db.queries.models.models import Employees, Places, Reports, Finances, ReportsDaily, OutboxDeliveries
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
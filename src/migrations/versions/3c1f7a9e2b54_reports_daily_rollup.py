@@ -0,0 +1,42 @@
+"""reports daily rollup
+
+Revision ID: 3c1f7a9e2b54
+Revises: bdf30b72ed12
+Create Date: 2026-10-18 12:04:31.417203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a9e2b54'
+down_revision: Union[str, None] = 'bdf30b72ed12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reports_daily',
+    sa.Column('report_date', sa.DATE(), nullable=False),
+    sa.Column('place_id', sa.INTEGER(), nullable=False),
+    sa.Column('user_id', sa.INTEGER(), nullable=False),
+    sa.Column('visitors', sa.BIGINT(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('report_date', 'place_id', 'user_id')
+    )
+    # заполняем сводку уже накопленными отчётами
+    op.execute(
+        """
+        INSERT INTO reports_daily (report_date, place_id, user_id, visitors, revenue)
+        SELECT r.report_date, COALESCE(r.place_id, 0), COALESCE(r.user_id, 0), SUM(r.visitors), SUM(r.revenue)
+        FROM reports AS r
+        GROUP BY r.report_date, COALESCE(r.place_id, 0), COALESCE(r.user_id, 0);
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reports_daily')
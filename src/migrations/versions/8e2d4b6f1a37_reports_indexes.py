@@ -0,0 +1,29 @@
+"""reports indexes
+
+Revision ID: 8e2d4b6f1a37
+Revises: 3c1f7a9e2b54
+Create Date: 2026-10-18 12:41:09.286514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d4b6f1a37'
+down_revision: Union[str, None] = '3c1f7a9e2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reports_report_date_place_id', 'reports', ['report_date', 'place_id'], unique=False)
+    op.create_index('ix_reports_place_id_report_date', 'reports', ['place_id', 'report_date'], unique=False)
+    op.create_index('ix_employees_role', 'employees', ['role'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_employees_role', table_name='employees')
+    op.drop_index('ix_reports_place_id_report_date', table_name='reports')
+    op.drop_index('ix_reports_report_date_place_id', table_name='reports')
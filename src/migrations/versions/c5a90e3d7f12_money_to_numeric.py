@@ -0,0 +1,47 @@
+"""money to numeric
+
+Revision ID: c5a90e3d7f12
+Revises: 8e2d4b6f1a37
+Create Date: 2026-10-18 13:22:47.905118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a90e3d7f12'
+down_revision: Union[str, None] = '8e2d4b6f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY_COLUMNS = [
+    ('reports', 'revenue'),
+    ('reports_daily', 'revenue'),
+    ('finances', 'last_money'),
+    ('finances', 'updated_money'),
+]
+
+
+def upgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Float(),
+            type_=sa.Numeric(14, 2),
+            existing_nullable=False,
+            postgresql_using=f'round({column}::numeric, 2)',
+        )
+
+
+def downgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Numeric(14, 2),
+            type_=sa.Float(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::double precision',
+        )
@@ -0,0 +1,43 @@
+"""outbox deliveries
+
+Revision ID: d9b3e61f4a28
+Revises: c5a90e3d7f12
+Create Date: 2026-10-18 14:10:52.613840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b3e61f4a28'
+down_revision: Union[str, None] = 'c5a90e3d7f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_deliveries',
+    sa.Column('id', sa.INTEGER(), nullable=False),
+    sa.Column('report_id', sa.INTEGER(), nullable=False),
+    sa.Column('chat_id', sa.BIGINT(), nullable=True),
+    sa.Column('method', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('status', sa.String(), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_attempt_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_deliveries_pending', 'outbox_deliveries', ['next_attempt_at'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_deliveries_pending', table_name='outbox_deliveries',
+                  postgresql_where=sa.text("status = 'pending'"))
+    op.drop_table('outbox_deliveries')
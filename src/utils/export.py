@@ -0,0 +1,75 @@
+import asyncio
+import csv
+import io
+from tempfile import SpooledTemporaryFile
+from typing import AsyncGenerator, AsyncIterator, List, Sequence
+
+from aiogram import Bot
+from aiogram.types import InputFile
+from openpyxl import Workbook
+
+# пока файл меньше этого размера, он живёт в памяти, дальше - на диске
+SPOOL_MAX_SIZE = 1024 * 1024
+# строк за один заход в поток записи, как batch_size у stream_reports_by_date
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_HEADER = ["Дата", "Точка", "Сотрудник", "Посетители", "Выручка"]
+
+
+class SpooledInputFile(InputFile):
+    def __init__(self, file: SpooledTemporaryFile, filename: str):
+        super().__init__(filename=filename)
+        self.file = file
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+async def export_csv(rows: AsyncIterator[Sequence], file: SpooledTemporaryFile) -> None:
+    # utf-8-sig, чтобы Excel сразу открыл кириллицу
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text, delimiter=";")
+
+    writer.writerow(EXPORT_HEADER)
+    async for batch in _batches(rows):
+        # запись (а после SPOOL_MAX_SIZE - на диск) не блокирует event loop
+        await asyncio.to_thread(writer.writerows, [
+            [report_date.strftime("%d.%m.%Y"), place, fullname, visitors, revenue]
+            for report_date, place, fullname, visitors, revenue in batch
+        ])
+
+    await asyncio.to_thread(text.flush)
+    # отвязываем обёртку, иначе при её удалении закроется и сам файл
+    text.detach()
+
+
+async def export_xlsx(rows: AsyncIterator[Sequence], file: SpooledTemporaryFile) -> None:
+    # write_only-книга пишет строки сразу во временный файл, не держа лист в памяти
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title="Отчёты")
+
+    sheet.append(EXPORT_HEADER)
+    async for batch in _batches(rows):
+        await asyncio.to_thread(_append_rows, sheet, batch)
+
+    # сборка zip-архива xlsx - самая долгая часть, в event loop её не пускаем
+    await asyncio.to_thread(workbook.save, file)
+
+
+def _append_rows(sheet, batch: List[Sequence]) -> None:
+    for row in batch:
+        sheet.append(list(row))
+
+
+async def _batches(rows: AsyncIterator[Sequence], size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[List[Sequence]]:
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
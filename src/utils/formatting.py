@@ -0,0 +1,8 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+
+def format_money(value: Union[Decimal, int, float, str]) -> str:
+    # 1234567.5 -> "1 234 568"
+    rubles = Decimal(value).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+    return f"{int(rubles):,}".replace(",", " ")
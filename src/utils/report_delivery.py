@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, List, Tuple, TypeVar, Union
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.methods import TelegramMethod, SendMessage, SendMediaGroup, SendPhoto
+from aiogram.types import InputMediaPhoto
+
+from src.db.name_cache import name_cache
+from src.utils.templates import split_message
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ReportTimings:
+    def __init__(self) -> None:
+        # kind -> счётчики по отчётам этого вида
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, kind: str, total_ms: float, stages: List[Tuple[str, float]], ok: bool) -> None:
+        stats = self._stats.setdefault(kind, {"count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["failed"] += 0 if ok else 1
+        stats["total_ms"] += total_ms
+        stats["max_ms"] = max(stats["max_ms"], total_ms)
+        stats["last_ms"] = total_ms
+        stats["last_stages"] = dict(stages)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            kind: {
+                "count": stats["count"],
+                "failed": stats["failed"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                "max_ms": round(stats["max_ms"], 2),
+                "last_ms": round(stats["last_ms"], 2),
+                "last_stages": stats["last_stages"],
+            }
+            for kind, stats in self._stats.items()
+        }
+
+
+report_timings = ReportTimings()
+
+
+class ReportTrace:
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.started_at = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    async def measure(self, stage: str, awaitable: Awaitable[T]) -> T:
+        started_at = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.stages.append((stage, round((time.perf_counter() - started_at) * 1000, 2)))
+
+    def finish(self, ok: bool = True) -> None:
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        report_timings.record(kind=self.kind, total_ms=total_ms, stages=self.stages, ok=ok)
+
+        stages = ", ".join(f"{stage} {ms} мс" for stage, ms in self.stages)
+        logger.info(f"Отчёт {self.kind}: {'ок' if ok else 'ошибка'} за {total_ms:.0f} мс ({stages})")
+
+
+async def prefetch_report(state: FSMContext, user_id: int, trace: ReportTrace) -> Tuple[Dict[str, Any], str]:
+    # данные FSM и имя сотрудника друг от друга не зависят - тянем параллельно.
+    # имя обычно уже в локальном кэше, в БД идём только при промахе и в Redis, и в памяти
+    data, fullname = await trace.measure("prefetch", asyncio.gather(
+        state.get_data(),
+        name_cache.get(user_id=user_id),
+    ))
+
+    return data, fullname
+
+
+def text_deliveries(text: str) -> List[Dict[str, Any]]:
+    # текст длиннее лимита Telegram уходит несколькими сообщениями подряд
+    return [{"method": "send_message", "payload": {"text": part}} for part in split_message(text)]
+
+
+def build_request(chat_id: Union[int, str], method: str, payload: Dict[str, Any]) -> TelegramMethod:
+    # deliveries: [{"method": ..., "payload": {...}}], тот же формат хранится в outbox_deliveries
+    if method == "send_message":
+        return SendMessage(
+            chat_id=chat_id,
+            text=payload["text"],
+            parse_mode="html",
+        )
+    if method == "send_media_group":
+        return SendMediaGroup(
+            chat_id=chat_id,
+            media=[
+                InputMediaPhoto(
+                    media=photo_file_id,
+                    caption=payload["caption"] if i == 0 else ""
+                ) for i, photo_file_id in enumerate(payload["photos"])
+            ],
+        )
+    if method == "send_photo":
+        return SendPhoto(
+            chat_id=chat_id,
+            photo=payload["photo"],
+            caption=payload["caption"],
+        )
+
+    raise ValueError(f"Неизвестный method отчёта: {method}")
+
+
+async def deliver_report(bot: Bot, chat_id: Union[int, str], deliveries: List[Dict[str, Any]], trace: ReportTrace) -> None:
+    # все запросы собираем заранее и отправляем подряд без пауз между ними.
+    # параллельно слать нельзя: порядок в чате Telegram - это порядок прихода запросов
+    requests = [build_request(chat_id, delivery["method"], delivery["payload"]) for delivery in deliveries]
+
+    for i, (delivery, request) in enumerate(zip(deliveries, requests)):
+        await trace.measure(f"{i}:{delivery['method']}", bot(request))
@@ -0,0 +1,124 @@
+import re
+from html import escape
+from string import Formatter
+from typing import Any, List, Tuple
+
+# лимит длины текста одного сообщения Telegram
+MESSAGE_LIMIT = 4096
+
+# в отчётах после escape других "<" нет, это только теги из самих шаблонов
+_TAG_RE = re.compile(r"<(/?)(\w+)[^>]*>")
+
+
+class ReportTemplate:
+    # шаблон разбирается один раз при импорте модуля, render только склеивает готовые куски.
+    # значения экранируются для parse_mode="html": имена, точки и ответы сотрудников вводятся руками.
+    # {field:raw} - без экранирования, для уже собранных HTML-фрагментов
+    def __init__(self, source: str) -> None:
+        self.source = source
+        # (текст до поля, имя поля или None, без экранирования)
+        self._parts: List[Tuple[str, str, bool]] = []
+
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if conversion or (spec and spec != "raw"):
+                raise ValueError(f"Неподдерживаемое поле в шаблоне: {{{field}!{conversion}:{spec}}}")
+            self._parts.append((literal, field, spec == "raw"))
+
+    def render(self, **values: Any) -> str:
+        chunks = []
+        for literal, field, raw in self._parts:
+            chunks.append(literal)
+            if field is not None:
+                value = values[field]
+                chunks.append(value if raw else escape(str(value), quote=False))
+
+        return "".join(chunks)
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    # режем по строкам, не разрывая теги и &-сущности: каждый кусок - валидный HTML.
+    # тег, открытый до границы куска (многострочный ответ внутри <em>), закрываем
+    # в конце куска и открываем заново в начале следующего
+    if len(text) <= limit:
+        return [text]
+
+    parts = []
+    # (имя, открывающий тег) всех открытых на текущий момент тегов
+    open_tags: List[Tuple[str, str]] = []
+    chunk: List[str] = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        line_tags = _track_tags(line, list(open_tags))
+
+        if chunk and size + len(line) + _closing_len(line_tags) > limit:
+            parts.append("".join(chunk) + _closing(open_tags))
+            chunk, size = [], 0
+
+        prefix = "" if chunk else _opening(open_tags)
+        if len(prefix) + len(line) + _closing_len(line_tags) > limit:
+            line_parts, open_tags = _split_line(line, limit, open_tags)
+            parts.extend(line_parts)
+            continue
+
+        chunk.append(prefix + line)
+        size += len(prefix) + len(line)
+        open_tags = line_tags
+
+    if chunk:
+        parts.append("".join(chunk) + _closing(open_tags))
+
+    return parts
+
+
+def _split_line(line: str, limit: int, open_tags: List[Tuple[str, str]]) -> Tuple[List[str], List[Tuple[str, str]]]:
+    # одна строка длиннее лимита (огромный ответ сотрудника): режем по символам,
+    # открытые теги закрываем в конце куска и открываем заново в начале следующего
+    parts = []
+    open_tags = list(open_tags)
+    pos = 0
+
+    while pos < len(line):
+        prefix = _opening(open_tags)
+        # запас под закрывающие теги: уже открытые и те, что откроются внутри куска
+        budget = limit - len(prefix) - _closing_len(open_tags) - 32
+        end = min(pos + budget, len(line))
+
+        # не режем внутри тега или &...;
+        tag_start = line.rfind("<", pos, end)
+        if tag_start != -1 and line.find(">", tag_start, end) == -1:
+            end = tag_start
+        amp = line.rfind("&", max(pos, end - 10), end)
+        if amp != -1 and line.find(";", amp, end) == -1:
+            end = amp
+        if end <= pos:
+            end = min(pos + budget, len(line))
+
+        piece = line[pos:end]
+        open_tags = _track_tags(piece, open_tags)
+        parts.append(prefix + piece + _closing(open_tags))
+        pos = end
+
+    return parts, open_tags
+
+
+def _track_tags(text: str, open_tags: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    for match in _TAG_RE.finditer(text):
+        if match.group(1):
+            if open_tags and open_tags[-1][0] == match.group(2):
+                open_tags.pop()
+        else:
+            open_tags.append((match.group(2), match.group(0)))
+
+    return open_tags
+
+
+def _opening(open_tags: List[Tuple[str, str]]) -> str:
+    return "".join(tag for _, tag in open_tags)
+
+
+def _closing(open_tags: List[Tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+
+
+def _closing_len(open_tags: List[Tuple[str, str]]) -> int:
+    return sum(len(name) + 3 for name, _ in open_tags)
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from src.config import settings
+from src.health import setup_health
+
+logger = logging.getLogger(__name__)
+
+
+def check_webhook_secret() -> None:
+    # без секрета любой, кто знает URL, может слать боту поддельные апдейты
+    if not settings.WEBHOOK_SECRET:
+        raise RuntimeError("USE_WEBHOOK=True требует непустой WEBHOOK_SECRET")
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    check_webhook_secret()
+    app = web.Application()
+
+    # запросы без правильного X-Telegram-Bot-Api-Secret-Token отклоняются с 401
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.WEBHOOK_SECRET,
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    setup_health(app, dp)
+
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    # проверяем до set_webhook, чтобы не зарегистрировать в Telegram вебхук без секрета
+    check_webhook_secret()
+    await bot.set_webhook(
+        url=f"{settings.WEBHOOK_BASE_URL.rstrip('/')}{settings.WEBHOOK_PATH}",
+        secret_token=settings.WEBHOOK_SECRET,
+        drop_pending_updates=settings.DROP_PENDING_UPDATES,
+    )
+
+    runner = web.AppRunner(create_webhook_app(dp=dp, bot=bot))
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT)
+    await site.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # на Windows сигналы через event loop не поддерживаются,
+            # там остаётся обычный KeyboardInterrupt
+            pass
+
+    try:
+        await stop_event.wait()
+    finally:
+        # вебхук не снимаем: Telegram сам накопит апдейты до следующего запуска
+        logger.warning("Останавливаю webhook-сервер")
+        await runner.cleanup()
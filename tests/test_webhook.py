@@ -0,0 +1,102 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+# настройки читаются при импорте src.config; для теста хватает заглушек,
+# ни БД, ни Redis, ни Telegram тест не трогает
+for name, value in {
+    "TOKEN": "42:TEST",
+    "REVENUE_CHAT_ID": "-1",
+    "ADMIN_ID": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "DB_NAME": "test",
+    "REDIS_HOST": "localhost",
+    "DAYS_FOR_FINANCES_CHECK": "7",
+}.items():
+    os.environ.setdefault(name, value)
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.types import Message  # noqa: E402
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+from src.config import settings  # noqa: E402
+from src.webhook import create_webhook_app  # noqa: E402
+
+SECRET = "s3cret-token"
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+        "text": "ping",
+    },
+}
+
+
+class WebhookSecretTest(unittest.IsolatedAsyncioTestCase):
+    # Telegram присылает апдейт POST-запросом с заголовком X-Telegram-Bot-Api-Secret-Token
+    async def asyncSetUp(self) -> None:
+        self.received = asyncio.Event()
+        self.texts = []
+
+        self.dp = Dispatcher()
+
+        @self.dp.message()
+        async def on_message(message: Message):
+            self.texts.append(message.text)
+            self.received.set()
+
+        self.bot = Bot(token="42:TEST")
+
+        patcher = mock.patch.object(settings, "WEBHOOK_SECRET", SECRET)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = TestClient(TestServer(create_webhook_app(dp=self.dp, bot=self.bot)))
+        await self.client.start_server()
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.bot.session.close()
+
+    async def post_update(self, headers: dict):
+        return await self.client.post(settings.WEBHOOK_PATH, json=UPDATE, headers=headers)
+
+    async def test_correct_secret_is_accepted(self):
+        response = await self.post_update({"X-Telegram-Bot-Api-Secret-Token": SECRET})
+
+        self.assertEqual(response.status, 200)
+        await asyncio.wait_for(self.received.wait(), timeout=1)
+        self.assertEqual(self.texts, ["ping"])
+
+    async def test_wrong_secret_is_rejected(self):
+        response = await self.post_update({"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+
+        self.assertEqual(response.status, 401)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.texts, [])
+
+    async def test_missing_secret_is_rejected(self):
+        response = await self.post_update({})
+
+        self.assertEqual(response.status, 401)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.texts, [])
+
+
+class WebhookWithoutSecretTest(unittest.TestCase):
+    def test_app_refuses_to_start_without_secret(self):
+        with mock.patch.object(settings, "WEBHOOK_SECRET", ""):
+            with self.assertRaises(RuntimeError):
+                create_webhook_app(dp=Dispatcher(), bot=Bot(token="42:TEST"))
+
+
+if __name__ == "__main__":
+    unittest.main()